@@ -1,931 +1,3479 @@
-"""
-Program requirements:
-    Python 3.10
-    'pygame' module (https://pypi.org/project/pygame/)
-"""
-
-import tkinter as tk
-from pygame.mixer import Sound as pySound
-import random, pygame
-from copy import deepcopy
-from time import sleep
-
-"""
-PlayerChooser:
-This section of the code is responsible for controlling the playerWhite and playerBlack variables,
-which control if the specific side is controlled by a human or the AI.
-
-If a human is playing white, whitePlayer is set to True. If an AI is playing white, whitePlayer is False
-If a human is playing black, blackPlayer is set to True. If an AI is playing black, blackPlayer is False
-"""
-def choosePlayer():
-    PlayerChooser = tk.Tk()
-    PlayerChooser.title("Who is playing?")
-    PlayerChooser.geometry("500x400")
-
-    PlayerChooser_Title0 = tk.Label(PlayerChooser, text="PyChess - Chess implementation in Python", font=("Helvetica",16))
-    PlayerChooser_Title0.place(relx=.5, rely=.1, anchor="n")
-    PlayerChooser_Title1 = tk.Label(PlayerChooser, text="What would you like to do?", font=("Helvetica",13))
-    PlayerChooser_Title1.place(relx=.5, rely=.2, anchor="n")
-    
-    def setPlayer(choice):
-        global whitePlayer, blackPlayer
-        match choice:
-            case 0:
-                whitePlayer, blackPlayer = True, False
-            case 1:
-                whitePlayer, blackPlayer = False, True
-            case 2:
-                whitePlayer, blackPlayer = True, True
-            case 3:
-                whitePlayer, blackPlayer = False, False
-        PlayerChooser.destroy()
-
-    PlayerChooser_Button0 = tk.Button(PlayerChooser, text="Play as white", command=lambda : setPlayer(0))
-    PlayerChooser_Button0.place(relx=.5, rely=.4, anchor="center")
-    PlayerChooser_Button1 = tk.Button(PlayerChooser, text="Play as black", command=lambda : setPlayer(1))
-    PlayerChooser_Button1.place(relx=.5, rely=.5, anchor="center")
-    PlayerChooser_Button2 = tk.Button(PlayerChooser, text="Play as both", command=lambda : setPlayer(2))
-    PlayerChooser_Button2.place(relx=.5, rely=.6, anchor="center")
-    PlayerChooser_Button3 = tk.Button(PlayerChooser, text="Let the AI play itself", command=lambda : setPlayer(3))
-    PlayerChooser_Button3.place(relx=.5, rely=.7, anchor="center")
-    
-    PlayerChooser.mainloop()
-
-"""
-MoveFinder:
-This section of the code is responsible for generating the moves used by the computer-controlled pieces.
-"""
-
-pieceScore = {"K":100, "Q":10, "R":5, "B":3, "N":3, "p":1}
-CHECKMATE = 1000
-STALEMATE = 0
-DEPTH = 2
-
-def FLIP(LISTIN):
-    LISTOUT = deepcopy(LISTIN)
-    LISTOUT.reverse()
-    return LISTOUT
-
-def NEGATE(LISTIN):
-    return [-i for i in LISTIN]
-
-
-
-# Random move generator - deprecated
-def findRandomMove(validMoves):
-    return validMoves[random.randint(0, len(validMoves)-1)]
-
-# Returns move for the AI opponent
-def findBestMove(state, valid):
-    # Due to how Python handles assignment statements, deep-copying the castling rights
-    # before the next AI move is generated and replacing the castling rights after
-    # the AI move is required due to Python removing the rights by mistake.
-    # For more information see https://tinyurl.com/copypython
-    
-    TEMP_CASTLING = deepcopy(state.currentCastling)
-    global nextMove
-    nextMove = None
-    alphabeta = [-CHECKMATE, CHECKMATE]
-    random.shuffle(valid)
-    findNMAlphaBetaMove(state, valid, DEPTH, alphabeta, 1 if state.whiteMove else -1)
-    state.currentCastling = TEMP_CASTLING
-    return nextMove
-
-# MinMax algorithm - deprecated
-def findMinMaxMove(state, valid, depth, whiteMove):
-    global nextMove
-    if not depth:
-        return findBoardScore(state)
-    
-    if whiteMove:
-        maxScore = -CHECKMATE
-        for move in valid:
-            state.makeMove(move)
-            nextMoves = state.getVMoves()
-            score = findMinMaxMove(state, nextMoves, depth - 1, False)
-            if score > maxScore:
-                maxScore = score
-                if depth == DEPTH:
-                    nextMove = move
-            state.undoMove()
-        return maxScore
-    else:
-        minScore = CHECKMATE
-        for move in valid:
-            state.makeMove(move)
-            nextMoves = state.getVMoves()
-            score = findMinMaxMove(state, nextMoves, depth - 1, True)
-            if score < minScore:
-                minScore = score
-                if depth == DEPTH:
-                    nextMove = move
-            state.undoMove()
-        return minScore
-
-# NegaMax algorithm wihtout Alpha-Beta pruning - deprecated
-def findNegaMaxMove(state, valid, depth, turnMulti):
-    global nextMove
-    if not depth:
-        return turnMulti * findBoardScore(state)
-    
-    maxScore = -CHECKMATE
-    for move in valid:
-        state.makeMove(move)
-        nextMoves = state.getVMoves()
-        score = -findNegaMaxMove(state, nextMoves, depth - 1, -turnMulti)
-        if score > maxScore:
-            maxScore = score
-            if depth == DEPTH:
-                nextMove = move
-        state.undoMove()
-    return maxScore
-
-# NegaMax algorithm with Alpha-Beta pruning
-def findNMAlphaBetaMove(state, valid, depth, alphabeta, turnMulti):
-    # alphabeta = [alpha, beta]
-    global nextMove
-    if not depth:
-        return turnMulti * findBoardScore(state)
-    
-    # move ordering will come later
-    maxScore = -CHECKMATE
-    for move in valid:
-        state.makeMove(move)
-        nextMoves = state.getVMoves()
-        score = -findNMAlphaBetaMove(state, nextMoves, depth-1, NEGATE(FLIP(alphabeta)), -turnMulti)
-        if score > maxScore:
-            maxScore = score
-            if depth == DEPTH:
-                nextMove = move
-        state.undoMove()
-        
-        # Pruning starts here
-        if maxScore > alphabeta[0]:
-            alphabeta[0] = maxScore
-        if alphabeta[0] >= alphabeta[1]:
-            break
-    return maxScore
-
-
-def findBoardScore(state):
-    """Generate a score given the current GameState.
-    Similar to evaluation number seen in other chess programs like lichess.org or chess.com
-    """
-    if state.checkmate:
-        if state.whiteMove:
-            return -CHECKMATE # Black wins
-        else:
-            return CHECKMATE # White wins
-    elif state.stalemate:
-        return STALEMATE
-    SCORE = 0
-    for row in state.board:
-        for square in row:
-            match square[0]:
-                case "w":
-                    SCORE += pieceScore[square[1]]
-                case "b":
-                    SCORE -= pieceScore[square[1]]
-    
-    return SCORE
-
-"""
-
-GameState:
-This class is responsible for storing all the information about the current state of a chess game.
-It will also be responsible for determining the valid moves at the current state, and a move log.
-
-"""
-
-class GameState:
-    def __init__(self):
-        self.board = [
-            ["bR","bN","bB","bQ","bK","bB","bN","bR"],
-            ["bp","bp","bp","bp","bp","bp","bp","bp"],
-            ["--","--","--","--","--","--","--","--"],
-            ["--","--","--","--","--","--","--","--"],
-            ["--","--","--","--","--","--","--","--"],
-            ["--","--","--","--","--","--","--","--"],
-            ["wp","wp","wp","wp","wp","wp","wp","wp"],
-            ["wR","wN","wB","wQ","wK","wB","wN","wR"]
-        ]
-        self.functions = {"p": self.getPawnMoves,
-                          "R": self.getRookMoves,
-                          "B": self.getBishopMoves,
-                          "N": self.getKnightMoves,
-                          "Q": self.getQueenMoves,
-                          "K": self.getKingMoves}
-        self.whiteMove = True
-        self.log = []
-        self.turnsSinceCapture = 0
-        self.wKlocation = (7, 4)
-        self.bKlocation = (0, 4)
-        self.checkmate = False
-        self.stalemate = False
-        self.fiftymove = False
-        self.enpassant = () # Coordinates for the square where it is possible
-        self.currentCastling = Castling(True, True, True, True)
-        self.castlingLog = [Castling(self.currentCastling.kingside[0],
-                                     self.currentCastling.kingside[1],
-                                     self.currentCastling.queenside[0],
-                                     self.currentCastling.queenside[1])]
-
-    def makeMove(self, move):
-        """Basic move execution (excluding castling, en-passant, and pawn promotion)"""
-        self.board[move.startRow][move.startCol] = "--"
-        self.board[move.endRow][move.endCol] = move.pieceMoved
-        self.log.append(move) # Log the current move so we can undo it later
-        self.whiteMove = not self.whiteMove # Switch the turns
-        if move.pieceMoved == "wK": # Update the location of the white king
-            self.wKlocation = (move.endRow, move.endCol)
-        elif move.pieceMoved == "bK": # Update the location of the black king
-            self.bKlocation = (move.endRow, move.endCol)
-
-        if move.isPromotion:
-            self.board[move.endRow][move.endCol] = move.pieceMoved[0] + "Q"
-        
-        if move.isEnPassant:
-            self.board[move.startRow][move.endCol] = "--"
-        
-        if move.pieceMoved[1] == "p" and abs(move.startRow - move.endRow) == 2:
-            self.enpassant = ((move.startRow + move.endRow) // 2, move.startCol)
-        else:
-            self.enpassant = ()
-        
-        if move.isCastle:
-            match (move.endCol - move.startCol):
-                case 2: # kingside/short castling
-                    self.board[move.endRow][move.endCol-1], self.board[move.endRow][move.endCol+1] = self.board[move.endRow][move.endCol+1], self.board[move.endRow][move.endCol-1]
-                case _: # queenside/long castling
-                    self.board[move.endRow][move.endCol+1], self.board[move.endRow][move.endCol-2] = self.board[move.endRow][move.endCol-2], self.board[move.endRow][move.endCol+1]
-        
-        self.updateCastling(move)
-        self.castlingLog.append(Castling(self.currentCastling.kingside[0],
-                                         self.currentCastling.kingside[1],
-                                         self.currentCastling.queenside[0],
-                                         self.currentCastling.queenside[1]))
-    
-    def undoMove(self):
-        """Undo a move."""
-        if len(self.log) != 0: # Make sure there is a move to undo
-            move = self.log.pop()
-            self.board[move.startRow][move.startCol] = move.pieceMoved
-            self.board[move.endRow][move.endCol] = move.pieceCaptured
-            self.whiteMove = not self.whiteMove # Switch the turns back
-            if move.pieceMoved == "wK": # Update the location of the white king
-                self.wKlocation = (move.startRow, move.startCol)
-            elif move.pieceMoved == "bK": # Update the location of the black king
-                self.bKlocation = (move.startRow, move.startCol)
-            
-            if move.isEnPassant:
-                self.board[move.endRow][move.endCol] = "--"
-                self.board[move.startRow][move.endCol] = move.pieceCaptured
-                self.enpassant = (move.endRow, move.endCol)
-            
-            if move.pieceMoved[1] == "p" and abs(move.startRow - move.endRow) == 2:
-                self.enpassant = ()
-            
-            self.castlingLog.pop()
-            self.currentCastling = self.castlingLog[-1]
-            
-            if move.isCastle:
-                match (move.endCol - move.startCol):
-                    case 2: # kingside/short castling
-                        self.board[move.endRow][move.endCol-1], self.board[move.endRow][move.endCol+1] = self.board[move.endRow][move.endCol+1], self.board[move.endRow][move.endCol-1]
-                    case _: # queenside/long castling
-                        self.board[move.endRow][move.endCol+1], self.board[move.endRow][move.endCol-2] = self.board[move.endRow][move.endCol-2], self.board[move.endRow][move.endCol+1]
-                
-    
-    def updateCastling(self, move):
-        """Update the castling rights if the given move was a king move or a rook move:
-        If the king or the rook was moved by <colour>,
-        then <colour>'s right to castle should be removed.
-        """
-        match move.pieceMoved:
-            case "wK":
-                self.currentCastling.kingside[0] = False
-                self.currentCastling.queenside[0] = False
-            case "bK":
-                self.currentCastling.kingside[1] = False
-                self.currentCastling.queenside[1] = False
-            case "wR":
-                if move.startRow == 7:
-                    if move.startRow == 0:
-                        self.currentCastling.queenside[0] = False
-                    elif move.startRow == 7:
-                        self.currentCastling.kingside[0] = False
-            case "bR":
-                if move.startRow == 0:
-                    if move.startCol == 0:
-                        self.currentCastling.queenside[1] = False
-                    elif move.startCol == 7:
-                        self.currentCastling.kingside[1] = False
-        match move.pieceCaptured:
-            case "wR":
-                if move.endRow == 7:
-                    if move.endCol == 0:
-                        self.currentCastling.queenside[0] = False
-                    elif move.endCol == 7:
-                        self.currentCastling.kingside[0] = False
-            case "bR":
-                if move.endRow == 0:
-                    if move.endCol == 0:
-                        self.currentCastling.queenside[1] = False
-                    elif move.endCol == 7:
-                        self.currentCastling.kingside[1] = False
-                
-                
-    
-    def getVMoves(self):
-        """Get all valid moves, considering checks
-        1. Generate all possible moves
-        2. For each move, make that move
-        3. Generate all opponent's moves
-        4. For each opponent move, see if it attacks the king
-        5. If it does, it is not valid
-        """
-        
-        #for log in self.castlingLog:
-        #   print(f"MOVE {self.castlingLog.index(log)}:: kingside white: {log.kingside[0]}, queenside white: {log.queenside[0]}")
-        #   print(f"MOVE {self.castlingLog.index(log)}:: kingside black: {log.kingside[1]}, queenside black: {log.queenside[1]}")
-        #print("\n")
-        
-        tempenpassant = self.enpassant
-        tempCastling = Castling(self.currentCastling.kingside[0],
-                                self.currentCastling.kingside[1],
-                                self.currentCastling.queenside[0],
-                                self.currentCastling.queenside[1])
-        
-        moves = self.getPMoves()
-        if self.whiteMove:
-            self.getCastlingMoves(self.wKlocation[0], self.wKlocation[1], moves)
-        else:
-            self.getCastlingMoves(self.bKlocation[0], self.bKlocation[1], moves)
-        
-        for i in range(len(moves)-1, -1, -1): # Go backwards through the list
-            self.makeMove(moves[i])
-            self.whiteMove = not self.whiteMove
-            if self.inCheck():
-                moves.remove(moves[i])
-            self.whiteMove = not self.whiteMove
-            self.undoMove()
-        if len(moves) == 0: # Checkmate or stalemate
-            self.checkmate, self.stalemate = (True, False) if self.inCheck() else (False, True)
-        else:
-            self.checkmate, self.stalemate = False, False
-
-        
-        self.enpassant = tempenpassant
-        self.currentCastling = tempCastling
-        return moves
-    
-    def inCheck(self):
-        if self.whiteMove:
-            return self.squareAttacked(self.wKlocation[0], self.wKlocation[1])
-        else:
-            return self.squareAttacked(self.bKlocation[0], self.bKlocation[1])
-    
-    def squareAttacked(self, row, column):
-        self.whiteMove = not self.whiteMove # Switch to opponent's turn
-        opponentMoves = self.getPMoves()
-        self.whiteMove = not self.whiteMove # Switch turns back
-        for move in opponentMoves:
-            if move.endRow == row and move.endCol == column: # Square is under attack
-                return True
-        return False
-        
-    
-    def getPMoves(self):
-        """Get all possible moves, without considering checks"""
-        moves = []
-        for row in range(len(self.board)): # Number of rows
-            for column in range(len(self.board[row])): # Number of columns in a given row
-                piece = (self.board[row][column][0], self.board[row][column][1])
-                if (piece[0] == "w" and self.whiteMove) or (piece[0] == "b" and not self.whiteMove):
-                    self.functions[piece[1]](row, column, moves)
-        return moves
-    
-    def getPawnMoves(self, row, column, moves):
-        if self.whiteMove: # It is white's turn, look at the white pawns
-            if self.board[row - 1][column] == "--": # Advance pawns by 1 square
-                moves.append(Move((row, column), (row - 1, column), self.board))
-                if row == 6 and self.board[row - 2][column] == "--": # Advance pawns by 2 squares
-                    moves.append(Move((row, column), (row - 2, column), self.board))
-            if column - 1 >= 0: # Captures to the left
-                if self.board[row - 1][column - 1][0] == "b":
-                    moves.append(Move((row, column), (row - 1, column - 1), self.board))
-                elif (row - 1, column - 1) == self.enpassant:
-                    moves.append(Move((row, column), (row - 1, column - 1), self.board, isEnPassant = True))
-            if column + 1 <= 7: # Captures to the right
-                if self.board[row - 1][column + 1][0] == "b":
-                    moves.append(Move((row, column), (row - 1, column + 1), self.board))
-                elif (row - 1, column + 1) == self.enpassant:
-                    moves.append(Move((row, column), (row - 1, column + 1), self.board, isEnPassant = True))
-        else:
-            if self.board[row + 1][column] == "--": # Advance pawns by 1 square
-                moves.append(Move((row, column), (row + 1, column), self.board))
-                if row == 1 and self.board[row + 2][column] == "--": # Advance pawns by 2 squares
-                    moves.append(Move((row, column), (row + 2, column), self.board))
-            if column - 1 >= 0: # Captures to the left
-                if self.board[row + 1][column - 1][0] == "w":
-                    moves.append(Move((row, column), (row + 1, column - 1), self.board))
-                elif (row + 1, column - 1) == self.enpassant:
-                    moves.append(Move((row, column), (row + 1, column - 1), self.board, isEnPassant = True))
-            if column + 1 <= 7: # Captures to the right
-                if self.board[row + 1][column + 1][0] == "w":
-                    moves.append(Move((row, column), (row + 1, column + 1), self.board))
-                elif (row + 1, column + 1) == self.enpassant:
-                    moves.append(Move((row, column), (row + 1, column + 1), self.board, isEnPassant = True))
-                
-                
-    def getRookMoves(self, row, column, moves):
-        directions = ( (-1, 0), (0, -1), (1, 0), (0, 1) )
-        enemyColor = "b" if self.whiteMove else "w"
-        for d in directions:
-            for i in range(1, 8):
-                endRow = row + d[0] * i
-                endCol = column + d[1] * i
-                if 0 <= endRow < 8 and 0 <= endCol < 8: # On board
-                    endPiece = self.board[endRow][endCol]
-                    if endPiece == "--": # Empty space
-                        moves.append(Move((row, column), (endRow, endCol), self.board))
-                    elif endPiece[0] == enemyColor: # Enemy piece
-                        moves.append(Move((row, column), (endRow, endCol), self.board))
-                        break
-                    else: # Friendly piece
-                        break
-                else: # Off the board
-                    break
-                    
-    def getBishopMoves(self, row, column, moves):
-        directions = ( (-1, -1), (-1, 1), (1, -1), (1, 1) )
-        enemyColor = "b" if self.whiteMove else "w"
-        for d in directions:
-            for i in range(1, 8):
-                endRow = row + d[0] * i
-                endCol = column + d[1] * i
-                if 0 <= endRow < 8 and 0 <= endCol < 8: # On board
-                    endPiece = self.board[endRow][endCol]
-                    if endPiece == "--": # Empty space
-                        moves.append(Move((row, column), (endRow, endCol), self.board))
-                    elif endPiece[0] == enemyColor: # Enemy piece
-                        moves.append(Move((row, column), (endRow, endCol), self.board))
-                        break
-                    else: # Friendly piece
-                        break
-                else: # Off the board
-                    break
-                
-    def getKnightMoves(self, row, column, moves):
-        directions = ( (-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1) )
-        friendlyColor = "w" if self.whiteMove else "b"
-        for d in directions:
-            endRow = row + d[0]
-            endCol = column + d[1]
-            if 0 <= endRow < 8 and 0 <= endCol < 8:
-                endPiece = self.board[endRow][endCol]
-                if endPiece[0] != friendlyColor: # Enemy piece or empty square
-                    moves.append(Move((row, column), (endRow, endCol), self.board))
-                    
-    def getQueenMoves(self, row, column, moves):
-        self.getRookMoves(row, column, moves)
-        self.getBishopMoves(row, column, moves)
-        
-    def getKingMoves(self, row, column, moves):
-        kingMoves = ( (-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1) )
-        friendlyColor = "w" if self.whiteMove else "b"
-        for i in range(8):
-            endRow = row + kingMoves[i][0]
-            endCol = column + kingMoves[i][1]
-            if 0 <= endRow < 8 and 0 <= endCol < 8:
-                endPiece = self.board[endRow][endCol]
-                if endPiece[0] != friendlyColor: # Enemy piece or empty square
-                    moves.append(Move((row, column), (endRow, endCol), self.board))
-    
-    def getCastlingMoves(self, row, column, moves):
-        """Generate valid castling moves for the king at (row, column)
-        There are two additional rules for castling (excluding the rules that the king and the rook must not have moved):
-        1. The king must not be in check
-        2. The king cannot pass through spaces under attack
-        """
-        
-        if self.squareAttacked(row, column):
-            return
-        if (self.whiteMove and self.currentCastling.kingside[0]) or (not self.whiteMove and self.currentCastling.kingside[1]):
-            self.castleShort(row, column, moves)
-        if (self.whiteMove and self.currentCastling.queenside[0]) or (not self.whiteMove and self.currentCastling.queenside[1]):
-            self.castleLong(row, column, moves)
-        
-    def castleShort(self, row, column, moves):
-        """Kingside castling, use alongside GameState.getCastlingMoves()"""
-        if self.board[row][column + 1] == self.board[row][column + 2] == "--":
-            if not (self.squareAttacked(row, column + 1) or self.squareAttacked(row, column + 2)):
-                moves.append(Move( (row, column), (row, column + 2), self.board, isCastle=True ))
-    def castleLong(self, row, column, moves):
-        """Queenside castling, use alongside GameState.getCastlingMoves()"""
-        if self.board[row][column - 1] == self.board[row][column - 2] == self.board[row][column - 3] == "--":
-            if not (self.squareAttacked(row, column - 1) or self.squareAttacked(row, column - 2)):
-                moves.append(Move( (row, column), (row, column - 2), self.board, isCastle=True ))
-    
-class Castling():
-    def __init__(self, shortW, shortB, longW, longB):
-        """
-        The terms 'short' and 'long' refer to the types of castling:
-        Short castling is another way of referring to kingside castling,
-        Long castling is another way of referring to queenside castling.
-        
-        self.kingside and self.queenside are set up as a tuple to reduce lines.
-        The first item in both tuples are white's rights, and the second item is black's rights
-        """
-        self.kingside = [shortW, shortB]
-        self.queenside = [longW, longB]
-        
-class Move():
-    # Converting ranks to rows, files to columns, and vice versa
-    rankstoRows = {'1':7, '2':6, '3':5, '4':4, '5':3, '6':2, '7':1, '8':0}
-    rowstoRanks = {v: k for k, v in rankstoRows.items()}
-    filestoCols = {'a':0, 'b':1, 'c':2, 'd':3, 'e':4, 'f':5, 'g':6, 'h':7}
-    colstoFiles = {v: k for k, v in filestoCols.items()}
-    
-    def __init__(self, start, end, board, isEnPassant = False, isCastle = False):
-        def getID(*args):
-            length = len(args)
-            temp = 0
-            for i in range(length, 0, -1):
-                item = args[(length - i)]
-                temp += item * (10 ** (i - 1))
-            return temp
-        
-        self.startRow = start[0]
-        self.startCol = start[1]
-        self.endRow = end[0]
-        self.endCol = end[1]
-        self.pieceMoved = board[self.startRow][self.startCol]
-        self.pieceCaptured = board[self.endRow][self.endCol]
-        self.ID = getID(self.startRow, self.startCol, self.endRow, self.endCol)
-        self.isCapture = self.pieceCaptured != "--"
-        
-        self.isPromotion = False
-        self.isPromotion = (self.pieceMoved == "wp" and self.endRow == 0) or (self.pieceMoved == "bp" and self.endRow == 7)
-        
-        self.isEnPassant = isEnPassant
-        if self.isEnPassant:
-            self.pieceCaptured = "wp" if self.pieceMoved == "bp" else "bp"
-        self.isCastle = isCastle
-
-    # Override the equals method
-    def __eq__(self, other):
-        if isinstance(other, Move):
-            return self.ID == other.ID
-    
-    # Override the str method
-    def __str__(self):
-        if self.isCastle: 
-            return "O-O" if self.endCol == 6 else "O-O-O"
-        
-        endSquare = self.getEndMove()
-        
-        if self.pieceMoved[1] == "p":
-            if self.isCapture:
-                return self.colstoFiles[self.startCol] + "x" + endSquare
-            else:
-                return endSquare
-        
-            # pawn promotions
-            
-        # Two of the same piece type moving to a square
-        
-        # Checks (+) and checkmates (#)
-        
-        # Piece moves
-        moveString = self.pieceMoved[1]
-        if self.isCapture:
-            moveString += "x"
-        return moveString + endSquare
-    
-    def getNotation(self):
-        # Make this look like real notation later
-        return self.getRF(self.startRow, self.startCol) + self.getRF(self.endRow, self.endCol)
-    
-    def getEndMove(self):
-        """Convert an end coordinate into readable notation."""
-        return self.getRF(self.endRow, self.endCol)
-    
-    def getStartMove(self):
-        """Convert a start coordinate into readable notation."""
-        return self.getRF(self.startRow, self.startCol)
-    
-    def getRF(self, row, column):
-        """Get the rank and file of a square given its row and column."""
-        return self.colstoFiles[column] + self.rowstoRanks[row]
-
-"""
-
-Below this class is the main code. It is responsible for handling user input,
-as well as displaying the current GameState object.
-
-"""
-
-BWIDTH, BHEIGHT = 512, 512
-LOGWIDTH, LOGHEIGHT = 250, BHEIGHT
-DIMENSION = 8 # Dimension of the chess board
-squareSize = BHEIGHT // DIMENSION
-FPS = 15
-IMAGES = {} # Blank dictionary to store images
-SFX = {}
-
-# Initialize images. This will be called once in the main loop.
-def loadImages():
-    """Loads all images into a dictionary called 'IMAGES' to be referenced when creating the board."""
-    pieces = ["wp","wR","wN","wB","wQ","wK","bp","bR","bN","bB","bQ","bK"]
-    for p in pieces:
-        IMAGES[p] = pygame.transform.scale(pygame.image.load("images/%s.png" % p), (squareSize, squareSize))
-
-# Initialize sounds.
-def loadSounds():
-    """Loads all sounds into a dictionary called 'SFX" to be called when a move is made."""
-    for S in ["capture","castle","check","end","move","start"]:
-        SFX[S] = pySound(fr"sounds\{S}.mp3")
-
-# Main function - handles user input and updating graphics
-
-def main():
-    
-    pygame.init() # Initialize pygame
-    screen = pygame.display.set_mode((BWIDTH + LOGWIDTH, BHEIGHT)) # Set the BHEIGHT and BWIDTH of the pygame window
-    
-    clock = pygame.time.Clock()
-    screen.fill(pygame.Color("white"))
-    logFont = pygame.font.SysFont("Consolas", 14, False, False)
-    
-    state = GameState()
-    valid = state.getVMoves()
-    
-    anim = False # Flag this variable when you want to animate a move
-    moveMade = False # Flag this variable when a valid move is made
-
-    global gameOver
-    gameOver = False # Flag this variable when the game is over
-    loadImages() # This loads all of the images, which should only be done once
-    loadSounds() # This loads all of the sound effects, which should only be done once
-    
-    global MANUAL_QUIT, restartGame
-    MANUAL_QUIT = False # Flag this variable when the user clicks the 'X' button to close the program.
-    restartGame = False # Flag this variable when the user wants to play again.
-    
-    selected = () # Initially, no square is selected. This should keep track of the user's last clicked square as a tuple (row, column)
-    clicks = [] # This should keep track of the player's current clicks as two tuples in a list [(start_row, start_column), (end_row, end_column)]
-
-    pySound.play(SFX["start"])
-
-    global done
-    done = False
-    while not done:
-        humanTurn = (state.whiteMove and whitePlayer) or (not state.whiteMove and blackPlayer)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                done = True
-            elif event.type == pygame.KEYDOWN: # Key handler
-##                if event.key == pygame.K_z: # Undo move
-##                    state.undoMove()
-##                    moveMade = True
-##                    anim = False
-                if event.key == pygame.K_r: # Reset game
-                    state = GameState()
-                    valid = state.getVMoves()
-                    selected = ()
-                    clicks = []
-                    moveMade = False
-                    anim = False
-            elif event.type == pygame.MOUSEBUTTONDOWN: # Mouse handler
-                if not gameOver and humanTurn:
-                    mousepos = pygame.mouse.get_pos() # Get the location of the mouse in the window, stored as (x, y)
-                    column = mousepos[0] // squareSize
-                    row = mousepos[1] // squareSize
-                    if (row, column) == selected or column >= 8: # Check if the user has clicked the same square twice or user clicked the move log
-                        selected = () # Clear the last clicked square stored in the tuple.
-                        clicks = [] # Clear the player's current clicks
-                    else:
-                        selected = (row, column)
-                        clicks.append(selected) # Append the 'clicks' list for both the 1st and 2nd clicks
-                    if len(clicks) == 2: # Check if there are two coordinates in the 'clicks' list
-                        move = Move(clicks[0], clicks[1], state.board)
-                        for i in range(len(valid)):
-                            if move == valid[i]:
-                                state.makeMove(valid[i])
-                                if move.isCastle or move.isPromotion:
-                                    pySound.play(SFX["castle"])
-                                    state.turnsSinceCapture += 1
-                                elif move.isCapture or move.isEnPassant:
-                                    pySound.play(SFX["capture"])
-                                    state.turnsSinceCapture = 0
-                                else:
-                                    pySound.play(SFX["move"])
-                                    state.turnsSinceCapture += 1
-                                anim = True
-                                moveMade = True
-                                selected = () # Reset user clicks
-                                clicks = []
-                        if not moveMade:
-                            clicks = [selected] 
-        
-        # AI move finder
-        if not (gameOver or humanTurn):
-            AIMove = findBestMove(state, valid)
-            if AIMove is None:
-                AIMove = findRandomMove(valid)
-            state.makeMove(AIMove)
-            moveMade = True
-            anim = True
-        
-        if moveMade:
-            if anim:
-                animate(screen, state.log[-1], state.board, clock)
-            valid = state.getVMoves()
-            moveMade = False
-            anim = False
-            
-        drawState(screen, state, valid, selected, logFont)
-        
-        global RESULT
-        if state.checkmate:
-            gameOver = True
-            done = True
-            pySound.play(SFX["end"])
-            if state.whiteMove:
-                RESULT = "Black won by checkmate!"
-            else:
-                RESULT = "White won by checkmate!"
-        elif state.stalemate:
-            gameOver = True
-            done = True
-            pySound.play(SFX["end"])
-            RESULT = "Draw by stalemate..."
-        elif state.turnsSinceCapture >= 50:
-            gameOver = True
-            done = True
-            pySound.play(SFX["end"])
-            RESULT = "Draw by 50-move rule..."
-        
-        clock.tick(FPS)
-        pygame.display.flip()
-    if not gameOver:
-        MANUAL_QUIT = True
-        pygame.quit()
-    else:
-        pass
-
-def squareHighlight(screen, state, moves, squareSelected):
-    """Move highlighting: Highlight both the piece selected and where it can move.
-
-    Args:
-        screen: pygame window
-        state: the current state of the board
-        moves: list of valid moves
-        square: the square selected
-    """
-    if squareSelected != ():
-        row, column = squareSelected
-        if state.board[row][column][0] == ("w" if state.whiteMove else "b"):
-            SQUARE = pygame.Surface((squareSize, squareSize))
-            SQUARE.set_alpha(100) # Transparency (transparent : 0 -> 255 : opaque)
-            SQUARE.fill(pygame.Color("blue"))
-            screen.blit(SQUARE, (column * squareSize, row * squareSize))
-            SQUARE.fill(pygame.Color("yellow"))
-            for move in moves:
-                if move.startRow == row and move.startCol == column:
-                    screen.blit(SQUARE, (squareSize * move.endCol, squareSize * move.endRow))
-                    
-# Draw the current GameState onto the board
-
-def drawState(screen, state, validMoves, selectedSquare, logFont):
-    drawBoard(screen) # Draw the squares on the board
-    squareHighlight(screen, state, validMoves, selectedSquare)
-    drawPieces(screen, state.board) # Draw the pieces on top of those squares
-    drawMoveLog(screen, state, logFont)
-
-def drawMoveLog(screen, state, font):
-    logRect = pygame.Rect(BWIDTH, 0, LOGWIDTH, LOGHEIGHT)
-    pygame.draw.rect(screen, pygame.Color("black"), logRect)
-    
-    moveLog = state.log
-    moveTexts = []
-    
-    for i in range(0, len(moveLog), 2):
-        moveString = str(i//2 + 1) + ": " + str(moveLog[i]) + ", "
-        
-        if i+1 < len(moveLog):
-            moveString += str(moveLog[i+1])
-        moveTexts.append(moveString)
-        
-    textY = padding = 5
-    
-    for i in range(len(moveTexts)):
-        text = moveTexts[i]
-        textObject = font.render(text, True, pygame.Color("white"))
-        
-        textLocation = logRect.move(padding, textY)
-        screen.blit(textObject, textLocation)
-        
-        textY += textObject.get_height()
-
-def drawBoard(screen):
-    """
-    Draw the squares on the board.
-    """
-    global colors
-    colors = [pygame.Color("white"), pygame.Color("gray")]
-    for row in range(DIMENSION):
-        for column in range(DIMENSION):
-            color = colors[((row + column) % 2)]
-            pygame.draw.rect(screen, color, pygame.Rect(column * squareSize, row * squareSize, squareSize, squareSize))
-
-def drawPieces(screen, board):
-    """
-    Draw the pieces on the board using the current GameState.board
-    """
-    for row in range(DIMENSION):
-        for column in range(DIMENSION):
-            piece = board[row][column]
-            if piece != "--": # Piece is not empty!
-                screen.blit(IMAGES[piece], pygame.Rect(column * squareSize, row * squareSize, squareSize, squareSize))
-
-def animate(screen, move, board, clock):
-    """Animate the given move."""
-    global colors
-    rowChange = move.endRow - move.startRow
-    columnChange = move.endCol - move.startCol
-    frames = 5 # frames per square
-    frame_count = frames * (abs(rowChange) + abs(columnChange))
-    
-    for f in range(frame_count + 1):
-        temp = [rowChange*f/frame_count, columnChange*f/frame_count]
-        row, column = move.startRow + temp[0], move.startCol + temp[1]
-        drawBoard(screen)
-        drawPieces(screen, board)
-        color = colors[(move.endRow + move.endCol) % 2]
-        finalSquare = pygame.Rect(move.endCol * squareSize, move.endRow * squareSize, squareSize, squareSize)
-        pygame.draw.rect(screen, color, finalSquare)
-        if move.pieceCaptured != "--":
-            if move.isEnPassant:
-                enpassantRow = move.endRow + 1 if move.pieceCaptured[0] == "b" else move.endRow - 1
-                finalSquare = pygame.Rect(move.endCol * squareSize, enpassantRow * squareSize, squareSize, squareSize)
-            screen.blit(IMAGES[move.pieceCaptured], finalSquare)
-        screen.blit(IMAGES[move.pieceMoved], pygame.Rect(column * squareSize, row * squareSize, squareSize, squareSize))
-        
-        pygame.display.flip()
-        clock.tick(60)
-
-def playAgain(result):
-    window = tk.Tk()
-    window.title("Play again?")
-    window.geometry("250x200")
-    
-    label0 = tk.Label(window, text=result, font=("Helvetica",12))
-    label0.place(relx=.5, rely=.2, anchor="n")
-    label1 = tk.Label(window, text="Would you like to play again?", font=("Helvetica",10))
-    label1.place(relx=.5, rely=.4, anchor="n")
-    
-    def setPlayAgain(n, w):
-        global restartGame
-        if n: # User wants to play again
-            restartGame = True
-        elif not n: # User does not want to play again
-            restartGame = False
-        w.destroy()
-    
-    button0 = tk.Button(window, text="Yes", command=lambda : setPlayAgain(1, window))
-    button0.place(relx=.5, rely=.6, anchor="center")
-    button1 = tk.Button(window, text="No", command=lambda : setPlayAgain(0, window))
-    button1.place(relx=.5, rely=.8, anchor="center")
-    
-    window.mainloop()
-
-def drawEndGameText(text, screen):
-    FONT = pygame.font.SysFont("Arial", 24, True, False)
-    textObj = FONT.render(text, 0, pygame.Color("red"))
-    textLoc = pygame.Rect(0, 0, BWIDTH, BHEIGHT).move(BWIDTH/2 - textObj.get_width()/2, BHEIGHT/2 - textObj.get_height()/2)
-    screen.blit(textObj, textLoc)
-
-if __name__ == "__main__":
-    while True:
-        choosePlayer()
-        main()
-        if MANUAL_QUIT:
-            pygame.quit()
-            break
-        else:
-            playAgain(RESULT)
-            if restartGame:
-                restartGame = False
-            else:
-                pygame.quit()
-                break
-        
-
-"""
-A portion of this code was derived from Eddie Sharick, Teacher of Computer Science and Physics
-His YouTube channel is linked below:
-https://www.youtube.com/@eddiesharick6649
-"""
+"""
+Program requirements:
+    Python 3.10
+    'pygame' module (https://pypi.org/project/pygame/), only needed for the GUI
+"""
+
+import random, argparse, sys, os, re, json, mmap, struct, multiprocessing, threading, subprocess, statistics
+from functools import partial
+from time import sleep, perf_counter, time, strftime
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+
+# The GUI toolkits are only imported by loadGUI(), so the engine (GameState, Move, findBestMove and the headless
+# modes) can be imported quickly, and without a display, SDL or Tk. This matters most for the worker processes.
+tk = pygame = pySound = None
+
+def loadGUI():
+    """Import tkinter and pygame for choosePlayer(), main() and the drawing functions"""
+    global tk, pygame, pySound
+    import tkinter as tk
+    import pygame
+    from pygame.mixer import Sound as pySound
+
+def runImportBenchmark(repeats=5):
+    """Time a cold start of this module in a new interpreter, with and without loading the GUI, and print the results"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for label, code in (("import pychess", "import pychess"),
+                        ("import pychess + loadGUI()", "import pychess; pychess.loadGUI()")):
+        times = []
+        for _ in range(repeats):
+            start = perf_counter()
+            result = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True)
+            times.append(perf_counter() - start)
+            if result.returncode:
+                break
+        if result.returncode:
+            print(f"{label:28} failed: {result.stderr.decode().strip().splitlines()[-1]}")
+        else:
+            print(f"{label:28} best {min(times) * 1000:7.1f} ms, median {statistics.median(times) * 1000:7.1f} ms ({repeats} runs)")
+
+"""
+PlayerChooser:
+This section of the code is responsible for controlling the playerWhite and playerBlack variables,
+which control if the specific side is controlled by a human or the AI.
+
+If a human is playing white, whitePlayer is set to True. If an AI is playing white, whitePlayer is False
+If a human is playing black, blackPlayer is set to True. If an AI is playing black, blackPlayer is False
+"""
+def choosePlayer():
+    PlayerChooser = tk.Tk()
+    PlayerChooser.title("Who is playing?")
+    PlayerChooser.geometry("500x400")
+
+    PlayerChooser_Title0 = tk.Label(PlayerChooser, text="PyChess - Chess implementation in Python", font=("Helvetica",16))
+    PlayerChooser_Title0.place(relx=.5, rely=.1, anchor="n")
+    PlayerChooser_Title1 = tk.Label(PlayerChooser, text="What would you like to do?", font=("Helvetica",13))
+    PlayerChooser_Title1.place(relx=.5, rely=.2, anchor="n")
+    
+    def setPlayer(choice):
+        global whitePlayer, blackPlayer
+        match choice:
+            case 0:
+                whitePlayer, blackPlayer = True, False
+            case 1:
+                whitePlayer, blackPlayer = False, True
+            case 2:
+                whitePlayer, blackPlayer = True, True
+            case 3:
+                whitePlayer, blackPlayer = False, False
+        PlayerChooser.destroy()
+
+    PlayerChooser_Button0 = tk.Button(PlayerChooser, text="Play as white", command=lambda : setPlayer(0))
+    PlayerChooser_Button0.place(relx=.5, rely=.4, anchor="center")
+    PlayerChooser_Button1 = tk.Button(PlayerChooser, text="Play as black", command=lambda : setPlayer(1))
+    PlayerChooser_Button1.place(relx=.5, rely=.5, anchor="center")
+    PlayerChooser_Button2 = tk.Button(PlayerChooser, text="Play as both", command=lambda : setPlayer(2))
+    PlayerChooser_Button2.place(relx=.5, rely=.6, anchor="center")
+    PlayerChooser_Button3 = tk.Button(PlayerChooser, text="Let the AI play itself", command=lambda : setPlayer(3))
+    PlayerChooser_Button3.place(relx=.5, rely=.7, anchor="center")
+    
+    PlayerChooser.mainloop()
+
+"""
+MoveFinder:
+This section of the code is responsible for generating the moves used by the computer-controlled pieces.
+"""
+
+pieceScore = {"K":100, "Q":10, "R":5, "B":3, "N":3, "p":1} # Used for move ordering
+CHECKMATE = 100000
+STALEMATE = 0
+DEPTH = 2
+TT_SIZE_MB = 32 # Memory cap for the transposition table
+RANDOMISE = True # Shuffle the root moves first, so that moves with the same ordering score are tried in a random order
+MAX_PLY = 64
+MATE_BOUND = CHECKMATE - MAX_PLY # Scores past this are checkmates, CHECKMATE - abs(score) plies from the root
+KILLERS = [[None, None] for _ in range(MAX_PLY)] # IDs of the last two quiet moves that caused a cutoff at each ply
+HISTORY = {} # (piece, end row, end column) -> how often that quiet move caused a cutoff, weighted by depth
+DELTA_MARGIN = 200 # Extra score allowed for positional gains before a capture is delta pruned
+DEBUG_EVAL = False # Check the incremental evaluation against a full recomputation wherever the search uses it (slow)
+WORKERS = 1 # Processes used by findBestMove(); more than 1 splits the root moves across a RootSearchPool
+STATS_FILE = None # JSON-lines file that the statistics of every search are appended to, see reportStats()
+PROFILE = False # Time the GameState methods that the search calls, see profileState()
+PROFILED_METHODS = ("getVMoves", "getCaptureMoves", "makeMove", "undoMove", "getEvaluation")
+
+"""
+Evaluation:
+Scores are in centipawns (100 = one pawn), positive is good for white.
+Each piece is worth its material value plus a bonus for the square it stands on, from a piece-square table.
+There are separate values for the middlegame and the endgame, which are blended by the game phase:
+the phase starts at 24 with all the minor and major pieces on the board and goes down as they are traded.
+
+The tables are written from white's point of view with rank 8 on the first line (the same layout as GameState.board).
+"""
+
+MG_VALUE = {"p":100, "N":320, "B":330, "R":500, "Q":900, "K":0}
+EG_VALUE = {"p":120, "N":300, "B":320, "R":520, "Q":950, "K":0}
+PHASE = {"p":0, "N":1, "B":1, "R":2, "Q":4, "K":0}
+MAX_PHASE = 24
+
+MG_TABLES = {
+    "p": [  0,  0,  0,  0,  0,  0,  0,  0,
+           50, 50, 50, 50, 50, 50, 50, 50,
+           10, 10, 20, 30, 30, 20, 10, 10,
+            5,  5, 10, 25, 25, 10,  5,  5,
+            0,  0,  0, 20, 20,  0,  0,  0,
+            5, -5,-10,  0,  0,-10, -5,  5,
+            5, 10, 10,-20,-20, 10, 10,  5,
+            0,  0,  0,  0,  0,  0,  0,  0],
+    "N": [-50,-40,-30,-30,-30,-30,-40,-50,
+          -40,-20,  0,  0,  0,  0,-20,-40,
+          -30,  0, 10, 15, 15, 10,  0,-30,
+          -30,  5, 15, 20, 20, 15,  5,-30,
+          -30,  0, 15, 20, 20, 15,  0,-30,
+          -30,  5, 10, 15, 15, 10,  5,-30,
+          -40,-20,  0,  5,  5,  0,-20,-40,
+          -50,-40,-30,-30,-30,-30,-40,-50],
+    "B": [-20,-10,-10,-10,-10,-10,-10,-20,
+          -10,  0,  0,  0,  0,  0,  0,-10,
+          -10,  0,  5, 10, 10,  5,  0,-10,
+          -10,  5,  5, 10, 10,  5,  5,-10,
+          -10,  0, 10, 10, 10, 10,  0,-10,
+          -10, 10, 10, 10, 10, 10, 10,-10,
+          -10,  5,  0,  0,  0,  0,  5,-10,
+          -20,-10,-10,-10,-10,-10,-10,-20],
+    "R": [  0,  0,  0,  0,  0,  0,  0,  0,
+            5, 10, 10, 10, 10, 10, 10,  5,
+           -5,  0,  0,  0,  0,  0,  0, -5,
+           -5,  0,  0,  0,  0,  0,  0, -5,
+           -5,  0,  0,  0,  0,  0,  0, -5,
+           -5,  0,  0,  0,  0,  0,  0, -5,
+           -5,  0,  0,  0,  0,  0,  0, -5,
+            0,  0,  0,  5,  5,  0,  0,  0],
+    "Q": [-20,-10,-10, -5, -5,-10,-10,-20,
+          -10,  0,  0,  0,  0,  0,  0,-10,
+          -10,  0,  5,  5,  5,  5,  0,-10,
+           -5,  0,  5,  5,  5,  5,  0, -5,
+            0,  0,  5,  5,  5,  5,  0, -5,
+          -10,  5,  5,  5,  5,  5,  0,-10,
+          -10,  0,  5,  0,  0,  0,  0,-10,
+          -20,-10,-10, -5, -5,-10,-10,-20],
+    "K": [-30,-40,-40,-50,-50,-40,-40,-30,
+          -30,-40,-40,-50,-50,-40,-40,-30,
+          -30,-40,-40,-50,-50,-40,-40,-30,
+          -30,-40,-40,-50,-50,-40,-40,-30,
+          -20,-30,-30,-40,-40,-30,-30,-20,
+          -10,-20,-20,-20,-20,-20,-20,-10,
+           20, 20,  0,  0,  0,  0, 20, 20,
+           20, 30, 10,  0,  0, 10, 30, 20]
+}
+EG_TABLES = dict(MG_TABLES) # Knights, bishops, rooks and queens use the same squares in the endgame
+EG_TABLES["p"] = [  0,  0,  0,  0,  0,  0,  0,  0,
+                   80, 80, 80, 80, 80, 80, 80, 80,
+                   50, 50, 50, 50, 50, 50, 50, 50,
+                   30, 30, 30, 30, 30, 30, 30, 30,
+                   15, 15, 15, 15, 15, 15, 15, 15,
+                    5,  5,  5,  5,  5,  5,  5,  5,
+                    0,  0,  0,  0,  0,  0,  0,  0,
+                    0,  0,  0,  0,  0,  0,  0,  0]
+EG_TABLES["K"] = [-50,-40,-30,-20,-20,-30,-40,-50,
+                  -30,-20,-10,  0,  0,-10,-20,-30,
+                  -30,-10, 20, 30, 30, 20,-10,-30,
+                  -30,-10, 30, 40, 40, 30,-10,-30,
+                  -30,-10, 30, 40, 40, 30,-10,-30,
+                  -30,-10, 20, 30, 30, 20,-10,-30,
+                  -30,-30,  0,  0,  0,  0,-30,-30,
+                  -50,-30,-30,-30,-30,-30,-30,-50]
+
+def buildScoreTable(values, tables):
+    """Combine the piece values and piece-square tables into one signed table for every piece, e.g. table["bN"][square].
+    Black's tables are white's tables flipped vertically and negated.
+    """
+    combined = {}
+    for piece in values:
+        combined["w" + piece] = [values[piece] + tables[piece][square] for square in range(64)]
+        combined["b" + piece] = [-(values[piece] + tables[piece][(7 - (square >> 3)) * 8 + (square & 7)]) for square in range(64)]
+    return combined
+
+MG_SCORES = buildScoreTable(MG_VALUE, MG_TABLES)
+EG_SCORES = buildScoreTable(EG_VALUE, EG_TABLES)
+
+def taperScore(mgScore, egScore, phase):
+    """Blend the middlegame and endgame scores by the game phase."""
+    phase = min(phase, MAX_PHASE) # Extra queens from promotions do not make it more of a middlegame
+    return (mgScore * phase + egScore * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+# Random move generator - deprecated
+def findRandomMove(validMoves):
+    return validMoves[random.randint(0, len(validMoves)-1)]
+
+# Returns move for the AI opponent
+def findBestMove(state, valid, depth=None, timeLimit=None, nodeLimit=None, workers=None, cancel=None, onStats=None):
+    """Find the best move for the side to move: a move from the opening book if the position is in it,
+    otherwise the result of a search. See searchPosition() for the arguments.
+    """
+    move = findBookMove(state, valid)
+    if move is not None:
+        return move
+    return searchPosition(state, valid, depth, timeLimit, nodeLimit, workers, cancel, onStats=onStats).bestMove
+
+def searchPosition(state, valid, depth=None, timeLimit=None, nodeLimit=None, workers=None, cancel=None, onIteration=None, onStats=None, profile=None):
+    """Search with iterativeDeepening() and return its Search object. See there for the arguments.
+    With more than one worker (WORKERS by default), the search is run by getRootSearchPool() instead.
+    When it is done, the statistics of the search are passed to reportStats(), along with onStats.
+    profile (PROFILE by default) times the GameState methods the search calls, see profileState().
+    """
+    workers = WORKERS if workers is None else workers
+    profile = PROFILE if profile is None else profile
+    if workers > 1:
+        search = getRootSearchPool(workers).search(state, valid, depth, timeLimit, nodeLimit, cancel, onIteration, profile)
+    else:
+        search = iterativeDeepening(state, valid, depth, timeLimit, nodeLimit, cancel, onIteration, profile)
+    reportStats(state, search, onStats)
+    return search
+
+def reportStats(state, search, onStats=None):
+    """Pass Search.getStats() (with the FEN of the position) to onStats, and append it to STATS_FILE, if either is set"""
+    if onStats is None and STATS_FILE is None:
+        return
+    stats = {"fen": state.getFEN(), **search.getStats()}
+    if onStats is not None:
+        onStats(stats)
+    if STATS_FILE is not None:
+        with open(STATS_FILE, "a") as file:
+            file.write(json.dumps(stats) + "\n")
+
+def profileState(state, timings):
+    """Count and time the calls to the PROFILED_METHODS of one GameState, adding them up in timings[name] as [calls, seconds].
+    The timed versions are set on the instance, so every other GameState runs at full speed, and unprofileState()
+    puts the methods back. Each time includes the cost of timing it, so compare them with each other, not with nps.
+    """
+    for name in PROFILED_METHODS:
+        setattr(state, name, timeCalls(getattr(state, name), timings.setdefault(name, [0, 0.0])))
+
+def timeCalls(method, total):
+    def timedMethod(*args):
+        start = perf_counter()
+        result = method(*args)
+        total[0] += 1
+        total[1] += perf_counter() - start
+        return result
+    return timedMethod
+
+def unprofileState(state):
+    for name in PROFILED_METHODS:
+        state.__dict__.pop(name, None)
+
+def iterativeDeepening(state, valid, depth=None, timeLimit=None, nodeLimit=None, cancel=None, onIteration=None, profile=False):
+    """Search to depth 1, then depth 2, and so on, and return the Search object of the last completed iteration.
+    
+    Args:
+        state: the current GameState
+        valid: list of valid moves in the current GameState
+        depth: deepest iteration to search (defaults to DEPTH when no time or node limit is given)
+        timeLimit: seconds the search may take, after which the current iteration is abandoned
+        nodeLimit: number of nodes the search may visit, after which the current iteration is abandoned
+        cancel: a threading.Event (or anything with is_set()) that stops the search straight away once it is set
+        onIteration: called with the Search object after each completed iteration
+        profile: time the GameState methods the search calls, into Search.timings (see profileState())
+    
+    Depth 1 is always completed, so there is always a move to return (unless there are no valid moves or the search was cancelled).
+    Each iteration leaves its best move in the transposition table, so the next iteration searches it first.
+    """
+    if depth is None:
+        depth = DEPTH if timeLimit is None and nodeLimit is None else MAX_PLY - 1
+    search = Search(min(depth, MAX_PLY - 1), timeLimit, nodeLimit, cancel)
+    if RANDOMISE:
+        random.shuffle(valid)
+    startNewSearch()
+    if profile:
+        search.timings = {}
+        profileState(state, search.timings)
+    
+    try:
+        for iterationDepth in range(1, search.maxDepth + 1):
+            score = findNMAlphaBetaMove(state, valid, iterationDepth, -CHECKMATE, CHECKMATE, 1 if state.whiteMove else -1, 0, search)
+            if search.stopped: # The iteration was not finished, so keep the result of the previous one
+                break
+            search.finishIteration(iterationDepth, score, search.rootMove)
+            if onIteration is not None:
+                onIteration(search)
+            if abs(score) >= MATE_BOUND: # A forced checkmate was found, searching deeper will not change the move
+                break
+    finally:
+        if profile:
+            unprofileState(state)
+    return search
+
+def startNewSearch():
+    """Get the transposition table, killers and history ready for a new search from a new position"""
+    transTable.newSearch()
+    for killers in KILLERS:
+        killers[0] = killers[1] = None
+    for key in HISTORY: # Keep what was learned last move, but let the new search outweigh it
+        HISTORY[key] //= 2
+
+class Search():
+    """
+    The state of one call to iterativeDeepening(): the limits it was given, how far it got and the best move it found.
+    """
+    def __init__(self, maxDepth, timeLimit, nodeLimit, cancel=None):
+        self.maxDepth = maxDepth
+        self.deadline = perf_counter() + timeLimit if timeLimit is not None else None
+        self.nodeLimit = nodeLimit
+        self.cancel = cancel
+        self.started = perf_counter()
+        self.nodes = 0
+        self.stopped = False
+        self.depth = 0 # The last depth that was searched completely
+        self.score = 0 # Score of the best move, from the point of view of the side to move
+        self.bestMove = None
+        self.rootMove = None # Best move so far in the iteration that is running
+        # Statistics, see getStats()
+        self.qnodes = 0 # Quiescence nodes (these are counted in nodes as well)
+        self.expanded = 0 # Nodes of the main search whose moves were searched, so that they could cut off
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0 # Cutoffs by the first move searched, which shows how good the move ordering is
+        self.ttProbes = 0
+        self.ttHits = 0
+        self.iterations = [] # {"depth", "time", "nodes", "score"} of each completed iteration
+        self.iterationStarted = self.started
+        self.iterationNodes = 0
+        self.timings = None # {method name: [calls, seconds]} when profiling, see profileState()
+    
+    COUNTERS = ("nodes", "qnodes", "expanded", "cutoffs", "firstMoveCutoffs", "ttProbes", "ttHits")
+    
+    def getCounters(self):
+        """The COUNTERS as a tuple, for sending from a worker process to addCounters()"""
+        return tuple(getattr(self, name) for name in Search.COUNTERS)
+    
+    def addCounters(self, counters):
+        for name, value in zip(Search.COUNTERS, counters):
+            setattr(self, name, getattr(self, name) + value)
+    
+    def addTimings(self, timings):
+        for name, (calls, seconds) in timings.items():
+            total = self.timings.setdefault(name, [0, 0.0])
+            total[0] += calls
+            total[1] += seconds
+    
+    def finishIteration(self, depth, score, move):
+        """Keep the result of a completed iteration, and record how long it took"""
+        now = perf_counter()
+        self.iterations.append({"depth": depth, "time": round(now - self.iterationStarted, 6), "nodes": self.nodes - self.iterationNodes, "score": score})
+        self.iterationStarted, self.iterationNodes = now, self.nodes
+        self.depth, self.score, self.bestMove = depth, score, move
+    
+    def getStats(self):
+        """Statistics about the search so far, as a dict that can be written out as JSON.
+        cutoffRate is the share of main search nodes that had a beta cutoff, and firstMoveCutoffs the share of those
+        cutoffs that came from the first move searched. timings is only there when the search was profiled.
+        """
+        elapsed = perf_counter() - self.started
+        stats = {
+            "move": self.bestMove.getNotation() if self.bestMove is not None else None,
+            "depth": self.depth,
+            "score": self.score,
+            "stopped": self.stopped,
+            "nodes": self.nodes,
+            "qnodes": self.qnodes,
+            "time": round(elapsed, 6),
+            "nps": int(self.nodes / elapsed) if elapsed else 0,
+            "cutoffRate": round(self.cutoffs / self.expanded, 4) if self.expanded else 0.0,
+            "firstMoveCutoffs": round(self.firstMoveCutoffs / self.cutoffs, 4) if self.cutoffs else 0.0,
+            "ttHitRate": round(self.ttHits / self.ttProbes, 4) if self.ttProbes else 0.0,
+            "iterations": self.iterations,
+        }
+        if self.timings is not None:
+            stats["timings"] = {name: {"calls": calls, "time": round(seconds, 6)} for name, (calls, seconds) in self.timings.items()}
+        return stats
+    
+    def checkLimits(self):
+        """Set and return the stopped flag if the search was cancelled,
+        or if the time or node limit has run out (never during the first iteration).
+        """
+        if self.cancel is not None and self.cancel.is_set():
+            self.stopped = True
+        elif self.depth > 0:
+            if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+                self.stopped = True
+            elif self.deadline is not None and perf_counter() >= self.deadline:
+                self.stopped = True
+        return self.stopped
+
+"""
+Parallel root search:
+The root moves are shared out between worker processes, which each search one root move at a time with their own
+transposition table, killers and history. Positions are sent as GameState.pack() tuples and moves as Move.ID,
+so very little has to be pickled. In every iteration the move that was best in the last one is searched first
+on its own, and its score becomes the alpha bound for the rest, which are then searched at the same time.
+Whenever a worker finds a better move it raises the shared alpha, so root moves started after that are searched
+with the narrower window.
+"""
+rootSearchPool = None
+
+def getRootSearchPool(workers):
+    """Return the RootSearchPool, starting it (or restarting it with a different number of workers) if needed.
+    The pool is kept between moves, so the worker processes and their transposition tables are reused.
+    """
+    global rootSearchPool
+    if rootSearchPool is None or rootSearchPool.workers != workers:
+        if rootSearchPool is not None:
+            rootSearchPool.close()
+        rootSearchPool = RootSearchPool(workers)
+    return rootSearchPool
+
+class RootSearchPool():
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        # Spawn rather than fork, so the workers do not inherit the pygame window and audio
+        context = multiprocessing.get_context("spawn")
+        self.alpha = context.Value("q", -CHECKMATE) # Best exact root score found so far in the current iteration
+        self.cancel = context.Event() # Stops the root moves that the workers are searching
+        self.searchNumber = 0 # Counts the searches, so that each worker knows when one of its tasks starts a new search
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=initRootWorker, initargs=(self.alpha, self.cancel))
+    
+    def search(self, state, valid, depth=None, timeLimit=None, nodeLimit=None, cancel=None, onIteration=None, profile=False):
+        """Iterative deepening like iterativeDeepening(), with the root moves searched by the worker processes.
+        Returns a Search object, whose node count and other statistics are the totals over all the workers.
+        """
+        if depth is None:
+            depth = DEPTH if timeLimit is None and nodeLimit is None else MAX_PLY - 1
+        search = Search(min(depth, MAX_PLY - 1), timeLimit, nodeLimit, cancel)
+        if profile:
+            search.timings = {}
+        self.searchNumber += 1
+        self.cancel.clear()
+        if not valid:
+            return search
+        packed = state.pack()
+        turnMulti = 1 if state.whiteMove else -1
+        moves = {move.ID: move for move in valid}
+        order = list(moves)
+        if RANDOMISE:
+            random.shuffle(order)
+        
+        for iterationDepth in range(1, search.maxDepth + 1):
+            self.alpha.value = -CHECKMATE
+            scores = {}
+            # Search the expected best move alone first, so that the others get its score as their alpha bound
+            results = self.runRootMoves(packed, order[:1], iterationDepth, turnMulti, search)
+            if not search.stopped:
+                scores.update(results)
+                results = self.runRootMoves(packed, order[1:], iterationDepth, turnMulti, search)
+                scores.update(results)
+            if search.stopped: # The iteration was not finished, so keep the result of the previous one
+                break
+            # A move that failed low only has an upper bound, so it can not be the best move
+            bestID = max(order, key=lambda moveID: (scores[moveID][1], scores[moveID][0]))
+            order.sort(key=lambda moveID: scores[moveID][0], reverse=True)
+            order.remove(bestID)
+            order.insert(0, bestID)
+            search.finishIteration(iterationDepth, scores[bestID][0], moves[bestID])
+            if onIteration is not None:
+                onIteration(search)
+            if abs(search.score) >= MATE_BOUND:
+                break
+        return search
+    
+    def runRootMoves(self, packed, moveIDs, depth, turnMulti, search):
+        """Search each of the root moves in a worker and return {move ID: (score, is exact)}.
+        Sets search.stopped if any of them ran out of time or nodes.
+        """
+        # The deadline is sent as wall-clock time, because moves may wait in the queue before a worker starts them
+        deadline = None if search.deadline is None else time() + search.deadline - perf_counter()
+        nodeLimit = None if search.nodeLimit is None else max(search.nodeLimit - search.nodes, 0)
+        profile = search.timings is not None
+        pending = {self.executor.submit(searchRootMove, packed, moveID, depth, turnMulti, deadline, nodeLimit, profile, self.searchNumber)
+                   for moveID in moveIDs}
+        results = {}
+        while pending:
+            # A cancel token can not be sent to the workers, so check it here and pass it on through self.cancel
+            done, pending = wait(pending, timeout=None if search.cancel is None else 0.01, return_when=FIRST_COMPLETED)
+            if search.cancel is not None and search.cancel.is_set():
+                self.cancel.set()
+                search.stopped = True
+            for future in done:
+                if future.cancelled():
+                    continue
+                moveID, score, exact, counters, timings, stopped = future.result()
+                search.addCounters(counters)
+                if profile:
+                    search.addTimings(timings)
+                search.stopped = search.stopped or stopped
+                results[moveID] = (score, exact)
+            if search.stopped: # The iteration will be thrown away, so do not start the moves still in the queue
+                for future in pending:
+                    future.cancel()
+        return results
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+workerState = None
+workerAlpha = None
+workerCancel = None
+workerSearchNumber = None # The RootSearchPool search that the worker last searched a root move for
+
+def initRootWorker(alpha, cancel):
+    """Runs once in each worker process of a RootSearchPool"""
+    global workerState, workerAlpha, workerCancel
+    workerState = GameState()
+    workerAlpha = alpha
+    workerCancel = cancel
+
+def searchRootMove(packed, moveID, depth, turnMulti, deadline, nodeLimit, profile, searchNumber):
+    """Search one root move in a worker process and return (move ID, score, is exact, Search counters, timings, stopped)"""
+    global workerSearchNumber
+    if searchNumber != workerSearchNumber: # The first root move of a new search that this worker is given
+        startNewSearch()
+        workerSearchNumber = searchNumber
+    workerState.unpack(packed)
+    move = next(move for move in workerState.getVMoves() if move.ID == moveID)
+    search = Search(depth, None if deadline is None else deadline - time(), nodeLimit, workerCancel)
+    search.depth = depth - 1 # Like iterativeDeepening(), only the first iteration has to finish
+    alpha = workerAlpha.value
+    if profile:
+        search.timings = {}
+        profileState(workerState, search.timings)
+    workerState.makeMove(move)
+    nextMoves = workerState.getVMoves()
+    score = -findNMAlphaBetaMove(workerState, nextMoves, depth - 1, -CHECKMATE, -alpha, -turnMulti, 1, search)
+    if profile:
+        unprofileState(workerState)
+    exact = score > alpha
+    if exact and not search.stopped:
+        with workerAlpha.get_lock():
+            workerAlpha.value = max(workerAlpha.value, score)
+    return moveID, score, exact, search.getCounters(), search.timings, search.stopped
+
+class BackgroundSearch():
+    """
+    Runs findBestMove() in a daemon thread, so that the GUI keeps handling events and drawing while the AI thinks.
+    The thread searches a copy of the position, because the GUI keeps drawing the real one.
+    onDone is called from the thread when the search has finished, so the GUI can wait for it without polling.
+    """
+    def __init__(self, state, onDone=None, **limits):
+        self.cancelToken = threading.Event()
+        self.move = None
+        self.onDone = onDone
+        position = state.copy() # With the move log, so the search knows which positions would repeat
+        self.thread = threading.Thread(target=self.run, args=(position, limits), daemon=True)
+        self.thread.start()
+    
+    def run(self, position, limits):
+        self.move = findBestMove(position, position.getVMoves(), cancel=self.cancelToken, **limits)
+        if self.onDone is not None:
+            self.onDone()
+    
+    def ready(self):
+        """True once the search has finished and self.move holds its result"""
+        return not self.thread.is_alive()
+    
+    def cancel(self):
+        """Stop the search and wait for the thread to finish, which happens within a few hundred nodes"""
+        self.cancelToken.set()
+        self.thread.join()
+
+# MinMax algorithm - deprecated
+def findMinMaxMove(state, valid, depth, whiteMove):
+    global nextMove
+    if not depth:
+        return findBoardScore(state)
+    
+    if whiteMove:
+        maxScore = -CHECKMATE
+        for move in valid:
+            state.makeMove(move)
+            nextMoves = state.getVMoves()
+            score = findMinMaxMove(state, nextMoves, depth - 1, False)
+            if score > maxScore:
+                maxScore = score
+                if depth == DEPTH:
+                    nextMove = move
+            state.undoMove()
+        return maxScore
+    else:
+        minScore = CHECKMATE
+        for move in valid:
+            state.makeMove(move)
+            nextMoves = state.getVMoves()
+            score = findMinMaxMove(state, nextMoves, depth - 1, True)
+            if score < minScore:
+                minScore = score
+                if depth == DEPTH:
+                    nextMove = move
+            state.undoMove()
+        return minScore
+
+# NegaMax algorithm wihtout Alpha-Beta pruning - deprecated
+def findNegaMaxMove(state, valid, depth, turnMulti):
+    global nextMove
+    if not depth:
+        return turnMulti * findBoardScore(state)
+    
+    maxScore = -CHECKMATE
+    for move in valid:
+        state.makeMove(move)
+        nextMoves = state.getVMoves()
+        score = -findNegaMaxMove(state, nextMoves, depth - 1, -turnMulti)
+        if score > maxScore:
+            maxScore = score
+            if depth == DEPTH:
+                nextMove = move
+        state.undoMove()
+    return maxScore
+
+# NegaMax algorithm with Alpha-Beta pruning
+def findNMAlphaBetaMove(state, valid, depth, alpha, beta, turnMulti, ply, search):
+    search.nodes += 1
+    if search.nodes & 255 == 0 and search.checkLimits():
+        return 0
+    
+    if ply and state.isRepetition(): # Repeating a position gets nowhere, so score it as the draw it would lead to
+        return 0
+    alphaStart = alpha
+    entry = transTable.probe(state.hash)
+    search.ttProbes += 1
+    if entry is not None:
+        search.ttHits += 1
+    if entry is not None and entry[1] >= depth and ply: # The root always searches, so that it finds a move
+        score, bound = fromTableScore(entry[2], ply), entry[3]
+        if bound == TranspositionTable.EXACT:
+            return score
+        elif bound == TranspositionTable.LOWER:
+            alpha = max(alpha, score)
+        else:
+            beta = min(beta, score)
+        if alpha >= beta:
+            return score
+    
+    if not valid: # Not the checkmate and stalemate flags, which can be left over from another position at the root
+        # A checkmate further from the root scores lower, so the nearest one is played
+        return -CHECKMATE + ply if state.inCheck() else STALEMATE
+    if ply and (state.occupancy["w"] | state.occupancy["b"]).bit_count() == 3:
+        # A draw is final, but a win is still searched, so that the search can see the checkmate coming
+        score = probeBitbases(state)
+        if score == 0 or (score is not None and not depth):
+            return turnMulti * score
+    if not depth:
+        return findQuiescenceScore(state, alpha, beta, turnMulti, ply, search)
+    
+    maxScore = -CHECKMATE
+    bestMove = None
+    search.expanded += 1
+    for index, move in enumerate(orderMoves(valid, entry[4] if entry is not None else None, ply)):
+        state.makeMove(move)
+        nextMoves = state.getVMoves()
+        score = -findNMAlphaBetaMove(state, nextMoves, depth-1, -beta, -alpha, -turnMulti, ply + 1, search)
+        state.undoMove()
+        if search.stopped:
+            return 0
+        if score > maxScore or bestMove is None: # Keep a move even if they all lose to checkmate
+            maxScore = score
+            bestMove = move
+            if not ply:
+                search.rootMove = move
+        
+        # Pruning starts here
+        if maxScore > alpha:
+            alpha = maxScore
+        if alpha >= beta:
+            search.cutoffs += 1
+            if not index:
+                search.firstMoveCutoffs += 1
+            if not (move.isCapture or move.isEnPassant or move.isPromotion): # Remember quiet moves that cause cutoffs
+                killers = KILLERS[ply]
+                if killers[0] != move.ID:
+                    killers[0], killers[1] = move.ID, killers[0]
+                key = (move.pieceMoved, move.endRow, move.endCol)
+                HISTORY[key] = HISTORY.get(key, 0) + depth * depth
+            break
+    
+    if maxScore <= alphaStart: # Every move failed low, so the real score is at most maxScore
+        bound = TranspositionTable.UPPER
+    elif maxScore >= beta: # A move failed high, so the real score is at least maxScore
+        bound = TranspositionTable.LOWER
+    else:
+        bound = TranspositionTable.EXACT
+    transTable.store(state.hash, depth, toTableScore(maxScore, ply), bound, bestMove)
+    return maxScore
+
+def toTableScore(score, ply):
+    """Checkmate scores count plies from the root, but the table stores them counted from the position itself,
+    because the same position can be reached at a different ply later.
+    """
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+def fromTableScore(score, ply):
+    """The reverse of toTableScore()"""
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+def orderMoves(moves, hashMove, ply):
+    """Sort the moves so that the ones most likely to cause a cutoff are searched first:
+    1. The best move stored in the transposition table
+    2. Captures and promotions, most valuable victim first, then least valuable attacker first (MVV-LVA)
+    3. The killer moves for this ply
+    4. Other quiet moves, by their history score
+    The sort is stable, so moves with equal scores stay in the order they were given.
+    """
+    killers = KILLERS[ply]
+    def moveScore(move):
+        if move.ID == hashMove:
+            return 1000000
+        if move.isCapture or move.isEnPassant or move.isPromotion:
+            return 100000 + captureScore(move)
+        if move.ID == killers[0]:
+            return 90000
+        if move.ID == killers[1]:
+            return 80000
+        return min(HISTORY.get((move.pieceMoved, move.endRow, move.endCol), 0), 70000)
+    return sorted(moves, key=moveScore, reverse=True)
+
+def captureScore(move):
+    """MVV-LVA score of a capture or promotion: the value gained times 100, minus the value of the piece moved"""
+    score = -pieceScore[move.pieceMoved[1]]
+    if move.pieceCaptured != "--":
+        score += 100 * pieceScore[move.pieceCaptured[1]]
+    if move.isPromotion:
+        score += 100 * (pieceScore[move.promotionPiece] - pieceScore["p"])
+    return score
+
+def findQuiescenceScore(state, alpha, beta, turnMulti, ply, search):
+    """Keep searching captures and promotions at the end of the main search, until the position is quiet.
+    Otherwise the search would stop in the middle of an exchange and score the position as if it was over.
+    
+    Stand pat: the side to move does not have to capture, so the static score is a lower bound.
+    Delta pruning: a capture is skipped when even winning the captured piece (plus DELTA_MARGIN)
+    cannot raise the score to alpha.
+    In check, neither applies: every move out of check is searched, and having none is checkmate.
+    """
+    search.nodes += 1
+    search.qnodes += 1
+    if search.nodes & 255 == 0 and search.checkLimits():
+        return 0
+    
+    inCheck = state.inCheck()
+    if inCheck:
+        maxScore = -CHECKMATE + ply # The score if there is no way out of check, as in findNMAlphaBetaMove()
+        # Not getVMoves(), which would overwrite the checkmate and stalemate flags of the position being searched
+        moves = state.generateMoves(False)
+    else:
+        standPat = maxScore = turnMulti * findEvaluation(state)
+        if standPat >= beta:
+            return standPat
+        if standPat > alpha:
+            alpha = standPat
+        moves = state.getCaptureMoves()
+    
+    for move in sorted(moves, key=captureScore, reverse=True):
+        gain = MG_VALUE[move.pieceCaptured[1]] if move.pieceCaptured != "--" else 0
+        if move.isPromotion:
+            gain += MG_VALUE[move.promotionPiece] - MG_VALUE["p"]
+        if not inCheck and standPat + gain + DELTA_MARGIN <= alpha: # Delta pruning
+            continue
+        state.makeMove(move)
+        score = -findQuiescenceScore(state, -beta, -alpha, -turnMulti, ply + 1, search)
+        state.undoMove()
+        if search.stopped:
+            return 0
+        if score > maxScore:
+            maxScore = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+    return maxScore
+
+class TranspositionTable():
+    """
+    Fixed-size table of search results, indexed by the low bits of the position's Zobrist key.
+    Each entry is a tuple (key, depth, score, bound, best move ID, generation).
+    
+    When two positions share a slot, the new result replaces the old one if the old one is from an earlier search
+    or was searched to a lower depth, so the table never grows past the memory cap.
+    """
+    EXACT, LOWER, UPPER = 0, 1, 2
+    ENTRY_BYTES = 200 # Rough size of one entry (the tuple, its integers and the slot in the list)
+    
+    def __init__(self, sizeMB=TT_SIZE_MB):
+        count = 1
+        while count * 2 * self.ENTRY_BYTES <= sizeMB * 1024 * 1024: # Largest power of two that fits
+            count *= 2
+        self.entries = [None] * count
+        self.mask = count - 1
+        self.generation = 0
+    
+    def probe(self, key):
+        """Return the entry for the given key, or None if the position has not been stored."""
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+    
+    def store(self, key, depth, score, bound, move):
+        index = key & self.mask
+        old = self.entries[index]
+        if old is None or old[0] == key or old[5] != self.generation or depth >= old[1]:
+            self.entries[index] = (key, depth, score, bound, move.ID if move is not None else None, self.generation)
+    
+    def newSearch(self):
+        """Age the stored entries, so that results from earlier searches are replaced first."""
+        self.generation += 1
+    
+    def clear(self):
+        self.entries = [None] * len(self.entries)
+        self.generation = 0
+
+transTable = TranspositionTable()
+
+
+def findPrincipalVariation(state, firstMove, length):
+    """The line of play that the search expects: firstMove, followed by the best moves stored in the
+    transposition table, up to length moves. Stored moves are checked against the valid moves, because another
+    position can have replaced the entry.
+    """
+    line = []
+    move = firstMove
+    while move is not None and len(line) < length:
+        line.append(move)
+        state.makeMove(move)
+        entry = transTable.probe(state.hash)
+        move = None
+        if entry is not None and entry[4] is not None:
+            # Not getVMoves(), which would overwrite the checkmate and stalemate flags of the position being searched
+            move = next((move for move in state.generateMoves(False) if move.ID == entry[4]), None)
+    for _ in line:
+        state.undoMove()
+    return line
+
+def findBoardScore(state):
+    """Generate a score given the current GameState.
+    Similar to evaluation number seen in other chess programs like lichess.org or chess.com
+    """
+    if state.checkmate:
+        if state.whiteMove:
+            return -CHECKMATE # Black wins
+        else:
+            return CHECKMATE # White wins
+    elif state.stalemate:
+        return STALEMATE
+    return findEvaluation(state)
+
+def findEvaluation(state):
+    """GameState.getEvaluation(), checked against findFullBoardScore() when DEBUG_EVAL is set"""
+    evaluation = state.getEvaluation()
+    if DEBUG_EVAL:
+        assert evaluation == findFullBoardScore(state), "incremental evaluation is out of date"
+    return evaluation
+
+def findFullBoardScore(state):
+    """Recompute the evaluation by looking at every square on the board (ignores checkmate and stalemate).
+    GameState.getEvaluation() gives the same result without the loop, this is kept to check it.
+    """
+    mgScore = egScore = phase = 0
+    for row in range(8):
+        for column in range(8):
+            square = state.board[row][column]
+            if square != "--":
+                mgScore += MG_SCORES[square][row * 8 + column]
+                egScore += EG_SCORES[square][row * 8 + column]
+                phase += PHASE[square[1]]
+    return taperScore(mgScore, egScore, phase)
+
+"""
+
+Bitboards:
+This section of the code is responsible for the precomputed tables used by the bitboard board engine.
+A bitboard is a 64-bit integer where bit (row * 8 + column) is set when that square is occupied,
+so bit 0 is a8 and bit 63 is h1 (the same orientation as GameState.board).
+
+"""
+
+PIECES = ("wp","wR","wN","wB","wQ","wK","bp","bR","bN","bB","bQ","bK")
+
+def buildLeaperTable(offsets):
+    """Build a table of attacked squares for a piece that jumps by the given (row, column) offsets."""
+    table = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        attacks = 0
+        for d in offsets:
+            endRow, endCol = row + d[0], column + d[1]
+            if 0 <= endRow < 8 and 0 <= endCol < 8:
+                attacks |= 1 << (endRow * 8 + endCol)
+        table.append(attacks)
+    return table
+
+def buildRayTable(direction):
+    """Build a table of every square reached by sliding from a square in one direction on an empty board."""
+    table = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        ray = 0
+        for i in range(1, 8):
+            endRow, endCol = row + direction[0] * i, column + direction[1] * i
+            if not (0 <= endRow < 8 and 0 <= endCol < 8):
+                break
+            ray |= 1 << (endRow * 8 + endCol)
+        table.append(ray)
+    return table
+
+KNIGHT_ATTACKS = buildLeaperTable(( (-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1) ))
+KING_ATTACKS = buildLeaperTable(( (-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1) ))
+# PAWN_ATTACKS[colour][square] is the set of squares a pawn of that colour on that square attacks
+PAWN_ATTACKS = {"w": buildLeaperTable(( (-1, -1), (-1, 1) )),
+                "b": buildLeaperTable(( (1, -1), (1, 1) ))}
+
+# The first four directions are rook directions, the last four are bishop directions
+DIRECTIONS = ( (-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1) )
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+RAYS = [buildRayTable(d) for d in DIRECTIONS]
+# A ray that goes towards higher square numbers meets its first blocker at the lowest set bit,
+# otherwise the first blocker is at the highest set bit
+POSITIVE = [d[0] * 8 + d[1] > 0 for d in DIRECTIONS]
+
+def slidingAttacks(square, occupied, directions):
+    """Squares attacked from the given square along the given directions, stopping at the first blocker."""
+    attacks = 0
+    for d in directions:
+        ray = RAYS[d][square]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE[d]:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= RAYS[d][blocker] # Remove the squares behind the blocker
+        attacks |= ray
+    return attacks
+
+def buildLineTables():
+    """Build the BETWEEN and LINE tables for every pair of squares on a shared rank, file or diagonal.
+    BETWEEN[a][b] is the squares strictly between a and b, LINE[a][b] is the whole line through a and b.
+    Both are 0 when the squares are not aligned.
+    """
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        for d in range(8):
+            opposite = DIRECTIONS.index((-DIRECTIONS[d][0], -DIRECTIONS[d][1]))
+            ray = RAYS[d][square]
+            fullLine = ray | RAYS[opposite][square] | (1 << square)
+            targets = ray
+            while targets:
+                lowest = targets & -targets
+                target = lowest.bit_length() - 1
+                between[square][target] = ray & ~RAYS[d][target] & ~lowest
+                line[square][target] = fullLine
+                targets ^= lowest
+    return between, line
+
+BETWEEN, LINE = buildLineTables()
+FULL = (1 << 64) - 1
+SQUARES = [(square >> 3, square & 7) for square in range(64)] # (row, column) of each square, shared so that moves do not create new tuples
+
+# Castling rights are kept as a bitmask of these four flags
+CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ = 1, 2, 4, 8
+ALL_CASTLING = CASTLE_WK | CASTLE_WQ | CASTLE_BK | CASTLE_BQ
+CASTLING_CHARS = (("K", CASTLE_WK), ("Q", CASTLE_WQ), ("k", CASTLE_BK), ("q", CASTLE_BQ)) # As written in FEN
+# CASTLING_MASK[square] is the rights that are kept when a piece moves from or to that square,
+# so moving a king or a rook (or capturing a rook) removes the rights that depend on it
+CASTLING_MASK = [ALL_CASTLING] * 64
+CASTLING_MASK[0] = ALL_CASTLING & ~CASTLE_BQ # a8
+CASTLING_MASK[4] = ALL_CASTLING & ~(CASTLE_BK | CASTLE_BQ) # e8
+CASTLING_MASK[7] = ALL_CASTLING & ~CASTLE_BK # h8
+CASTLING_MASK[56] = ALL_CASTLING & ~CASTLE_WQ # a1
+CASTLING_MASK[60] = ALL_CASTLING & ~(CASTLE_WK | CASTLE_WQ) # e1
+CASTLING_MASK[63] = ALL_CASTLING & ~CASTLE_WK # h1
+
+UNDO_STACK_SIZE = 256 # Undo entries allocated at a time (one is used per move in the log)
+
+# Zobrist keys: the hash of a position is the XOR of one random number for every piece on its square,
+# plus one for the side to move, one for the castling rights and one for the en-passant file.
+# A fixed seed keeps the keys (and so the hashes) the same every time the program runs.
+zobristRandom = random.Random(704)
+ZOBRIST_PIECES = {piece: [zobristRandom.getrandbits(64) for _ in range(64)] for piece in PIECES}
+ZOBRIST_BLACK = zobristRandom.getrandbits(64)
+ZOBRIST_CASTLING = [zobristRandom.getrandbits(64) for _ in range(16)]
+ZOBRIST_ENPASSANT = [zobristRandom.getrandbits(64) for _ in range(8)]
+
+def rookAttacks(square, occupied):
+    return slidingAttacks(square, occupied, ROOK_DIRECTIONS)
+
+def bishopAttacks(square, occupied):
+    return slidingAttacks(square, occupied, BISHOP_DIRECTIONS)
+
+"""
+
+GameState:
+This class is responsible for storing all the information about the current state of a chess game.
+It will also be responsible for determining the valid moves at the current state, and a move log.
+
+The position is stored twice: GameState.board is used by the GUI and the Move class,
+while GameState.bitboards (one bitboard per piece) and GameState.occupancy (one bitboard per colour)
+are used by the move generator.
+
+"""
+
+class GameState:
+    def __init__(self, fen=None):
+        """Set up the start position, or the position described by fen (see loadFEN())"""
+        self.board = [
+            ["bR","bN","bB","bQ","bK","bB","bN","bR"],
+            ["bp","bp","bp","bp","bp","bp","bp","bp"],
+            ["--","--","--","--","--","--","--","--"],
+            ["--","--","--","--","--","--","--","--"],
+            ["--","--","--","--","--","--","--","--"],
+            ["--","--","--","--","--","--","--","--"],
+            ["wp","wp","wp","wp","wp","wp","wp","wp"],
+            ["wR","wN","wB","wQ","wK","wB","wN","wR"]
+        ]
+        self.functions = {"p": self.getPawnMoves,
+                          "R": self.getRookMoves,
+                          "B": self.getBishopMoves,
+                          "N": self.getKnightMoves,
+                          "Q": self.getQueenMoves,
+                          "K": self.getKingMoves}
+        self.whiteMove = True
+        self.log = []
+        self.turnsSinceCapture = 0
+        self.wKlocation = (7, 4)
+        self.bKlocation = (0, 4)
+        self.checkmate = False
+        self.stalemate = False
+        self.fiftymove = False
+        self.enpassant = () # Coordinates for the square where it is possible
+        self.currentCastling = ALL_CASTLING # Bitmask of CASTLE_WK, CASTLE_WQ, CASTLE_BK and CASTLE_BQ
+        # One entry per move in the log: [castling rights, en-passant square, turnsSinceCapture, piece captured, hash]
+        # from before the move was made. The entries are reused, so making and undoing moves does not allocate anything.
+        self.undoStack = [[0, (), 0, "--", 0] for _ in range(UNDO_STACK_SIZE)]
+        self.startPly = 0 # Plies played before the first move in the log, for the full move number of FEN
+        self.setBitboards()
+        self.hash = self.getHash()
+        if fen is not None:
+            self.loadFEN(fen)
+
+    def loadFEN(self, fen):
+        """Set up the position described by a FEN string (Forsyth-Edwards Notation).
+        The move log is cleared, so the moves before this position cannot be undone.
+        Raises ValueError for a malformed FEN, and leaves the position as it was.
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+        board = []
+        for rank in fields[0].split("/"):
+            row = []
+            for char in rank:
+                if char.isdigit():
+                    row.extend(["--"] * int(char))
+                elif char.upper() in "PNBRQK":
+                    row.append(("w" if char.isupper() else "b") + ("p" if char.upper() == "P" else char.upper()))
+                else:
+                    raise ValueError(f"Unknown piece {char!r} in FEN: {fen!r}")
+            board.append(row)
+        if len(board) != 8 or any(len(row) != 8 for row in board):
+            raise ValueError(f"FEN board is not 8x8: {fen!r}")
+        if any(sum(row.count(king) for row in board) != 1 for king in ("wK", "bK")):
+            raise ValueError(f"FEN needs one king of each colour: {fen!r}")
+        if fields[1] not in ("w", "b"):
+            raise ValueError(f"FEN side to move is not w or b: {fen!r}")
+        if fields[2] != "-" and not re.fullmatch("K?Q?k?q?", fields[2]):
+            raise ValueError(f"Bad castling rights in FEN: {fen!r}")
+        if fields[3] != "-":
+            if not re.fullmatch("[a-h][36]", fields[3]):
+                raise ValueError(f"Bad en-passant square in FEN: {fen!r}")
+            # The target is the square the pawn that has just moved two squares passed over, so the pawn is in front of it
+            row, column = Move.rankstoRows[fields[3][1]], Move.filestoCols[fields[3][0]]
+            whiteMove = fields[1] == "w"
+            if fields[3][1] != ("6" if whiteMove else "3") or board[row + (1 if whiteMove else -1)][column] != ("bp" if whiteMove else "wp"):
+                raise ValueError(f"En-passant square in FEN does not follow a pawn move: {fen!r}")
+        if not all(field.isdigit() for field in fields[4:6]) or fields[5:6] == ["0"]:
+            raise ValueError(f"Bad move counters in FEN: {fen!r}")
+        
+        self.board = board
+        self.whiteMove = fields[1] == "w"
+        self.currentCastling = 0
+        for char, right in CASTLING_CHARS:
+            if char in fields[2]:
+                self.currentCastling |= right
+        if fields[3] != "-":
+            self.enpassant = SQUARES[Move.rankstoRows[fields[3][1]] * 8 + Move.filestoCols[fields[3][0]]]
+        else:
+            self.enpassant = ()
+        self.turnsSinceCapture = int(fields[4]) if len(fields) > 4 else 0
+        self.startPly = (int(fields[5]) - 1) * 2 + (not self.whiteMove) if len(fields) > 5 else (not self.whiteMove)
+        self.resetPosition()
+
+    def getFEN(self):
+        """Describe the position as a FEN string, the reverse of loadFEN()"""
+        ranks = []
+        for row in self.board:
+            rank, empty = "", 0
+            for piece in row:
+                if piece == "--":
+                    empty += 1
+                    continue
+                if empty:
+                    rank, empty = rank + str(empty), 0
+                char = "P" if piece[1] == "p" else piece[1]
+                rank += char if piece[0] == "w" else char.lower()
+            ranks.append(rank + (str(empty) if empty else ""))
+        castling = "".join(char for char, right in CASTLING_CHARS if self.currentCastling & right) or "-"
+        enpassant = Move.colstoFiles[self.enpassant[1]] + Move.rowstoRanks[self.enpassant[0]] if self.enpassant else "-"
+        fullMove = (self.startPly + len(self.log)) // 2 + 1
+        return f"{'/'.join(ranks)} {'w' if self.whiteMove else 'b'} {castling} {enpassant} {self.turnsSinceCapture} {fullMove}"
+
+    def pack(self):
+        """A compact copy of the position (without the move log) that is cheap to send to another process"""
+        return ("".join("".join(row) for row in self.board), self.whiteMove, self.currentCastling, self.enpassant, self.turnsSinceCapture)
+
+    def unpack(self, packed):
+        """Set up a position made by pack(). Like loadFEN(), this clears the move log."""
+        board, self.whiteMove, self.currentCastling, self.enpassant, self.turnsSinceCapture = packed
+        self.board = [[board[i:i+2] for i in range(row * 16, row * 16 + 16, 2)] for row in range(8)]
+        self.resetPosition()
+
+    def copy(self):
+        """An independent copy of the game, with its move log, so that undoMove() and isRepetition() work on the copy too"""
+        position = GameState()
+        position.unpack(self.pack())
+        position.log = list(self.log)
+        position.undoStack = [list(entry) for entry in self.undoStack]
+        position.startPly = self.startPly
+        return position
+
+    def isRepetition(self):
+        """True if the position has been seen before, looking back only as far as the last capture or pawn move"""
+        first = max(len(self.log) - self.turnsSinceCapture, 0)
+        for index in range(len(self.log) - 2, first - 1, -2): # Only positions with the same side to move can match
+            if self.undoStack[index][4] == self.hash:
+                return True
+        return False
+
+    def resetPosition(self):
+        """Find the kings, rebuild the bitboards and the hash, and clear the log after the board has been replaced"""
+        for row in range(8):
+            for column in range(8):
+                if self.board[row][column] == "wK":
+                    self.wKlocation = (row, column)
+                elif self.board[row][column] == "bK":
+                    self.bKlocation = (row, column)
+        self.log = []
+        self.checkmate = self.stalemate = self.fiftymove = False
+        self.setBitboards()
+        self.hash = self.getHash()
+
+    def setBitboards(self):
+        """Rebuild the bitboards and the evaluation terms from GameState.board"""
+        self.bitboards = dict.fromkeys(PIECES, 0)
+        self.occupancy = {"w": 0, "b": 0}
+        self.mgScore = self.egScore = self.phase = 0
+        for row in range(8):
+            for column in range(8):
+                piece = self.board[row][column]
+                if piece != "--":
+                    self.bitboards[piece] |= 1 << (row * 8 + column)
+                    self.occupancy[piece[0]] |= 1 << (row * 8 + column)
+                    self.mgScore += MG_SCORES[piece][row * 8 + column]
+                    self.egScore += EG_SCORES[piece][row * 8 + column]
+                    self.phase += PHASE[piece[1]]
+    
+    def getEvaluation(self):
+        """Score of the position (positive is good for white), kept up to date by putPiece() and clearSquare()"""
+        return taperScore(self.mgScore, self.egScore, self.phase)
+
+    def getHash(self):
+        """Compute the Zobrist key of the position from scratch.
+        makeMove() and undoMove() keep GameState.hash up to date incrementally, this is used to start it off.
+        """
+        key = 0
+        for piece in PIECES:
+            pieces = self.bitboards[piece]
+            while pieces:
+                lowest = pieces & -pieces
+                key ^= ZOBRIST_PIECES[piece][lowest.bit_length() - 1]
+                pieces ^= lowest
+        if not self.whiteMove:
+            key ^= ZOBRIST_BLACK
+        key ^= ZOBRIST_CASTLING[self.currentCastling]
+        if self.enpassant:
+            key ^= ZOBRIST_ENPASSANT[self.enpassant[1]]
+        return key
+
+    def putPiece(self, piece, row, column):
+        """Place a piece on an empty square, updating the board, the bitboards, the hash and the evaluation."""
+        square = row * 8 + column
+        bit = 1 << square
+        self.board[row][column] = piece
+        self.bitboards[piece] |= bit
+        self.occupancy[piece[0]] |= bit
+        self.hash ^= ZOBRIST_PIECES[piece][square]
+        self.mgScore += MG_SCORES[piece][square]
+        self.egScore += EG_SCORES[piece][square]
+        self.phase += PHASE[piece[1]]
+
+    def clearSquare(self, row, column):
+        """Remove whatever piece is on a square, updating the board, the bitboards, the hash and the evaluation."""
+        piece = self.board[row][column]
+        if piece != "--":
+            square = row * 8 + column
+            mask = ~(1 << square)
+            self.bitboards[piece] &= mask
+            self.occupancy[piece[0]] &= mask
+            self.board[row][column] = "--"
+            self.hash ^= ZOBRIST_PIECES[piece][square]
+            self.mgScore -= MG_SCORES[piece][square]
+            self.egScore -= EG_SCORES[piece][square]
+            self.phase -= PHASE[piece[1]]
+
+    def makeMove(self, move):
+        """Move execution (including castling, en-passant, and pawn promotion)"""
+        # Save what the move cannot tell undoMove() on the undo stack
+        index = len(self.log)
+        if index == len(self.undoStack):
+            self.undoStack.extend([[0, (), 0, "--", 0] for _ in range(UNDO_STACK_SIZE)])
+        entry = self.undoStack[index]
+        entry[0] = self.currentCastling
+        entry[1] = self.enpassant
+        entry[2] = self.turnsSinceCapture
+        entry[3] = move.pieceCaptured
+        entry[4] = self.hash
+        
+        self.clearSquare(move.startRow, move.startCol)
+        self.clearSquare(move.endRow, move.endCol) # Remove the captured piece (if any)
+        if move.isEnPassant:
+            self.clearSquare(move.startRow, move.endCol)
+        if move.isPromotion:
+            self.putPiece(move.pieceMoved[0] + move.promotionPiece, move.endRow, move.endCol)
+        else:
+            self.putPiece(move.pieceMoved, move.endRow, move.endCol)
+        self.log.append(move) # Log the current move so we can undo it later
+        self.whiteMove = not self.whiteMove # Switch the turns
+        self.hash ^= ZOBRIST_BLACK
+        if move.pieceMoved == "wK": # Update the location of the white king
+            self.wKlocation = SQUARES[move.endRow * 8 + move.endCol]
+        elif move.pieceMoved == "bK": # Update the location of the black king
+            self.bKlocation = SQUARES[move.endRow * 8 + move.endCol]
+        
+        if self.enpassant:
+            self.hash ^= ZOBRIST_ENPASSANT[self.enpassant[1]]
+        if move.pieceMoved[1] == "p" and abs(move.startRow - move.endRow) == 2:
+            self.enpassant = SQUARES[(move.startRow + move.endRow) // 2 * 8 + move.startCol]
+            self.hash ^= ZOBRIST_ENPASSANT[move.startCol]
+        else:
+            self.enpassant = ()
+        
+        # Halfmove clock for the 50-move rule: reset by pawn moves and captures
+        if move.pieceMoved[1] == "p" or move.pieceCaptured != "--":
+            self.turnsSinceCapture = 0
+        else:
+            self.turnsSinceCapture += 1
+        
+        if move.isCastle:
+            match (move.endCol - move.startCol):
+                case 2: # kingside/short castling
+                    self.moveRook(move.endRow, move.endCol + 1, move.endCol - 1)
+                case _: # queenside/long castling
+                    self.moveRook(move.endRow, move.endCol - 2, move.endCol + 1)
+        
+        self.updateCastling(move)
+    
+    def undoMove(self):
+        """Undo a move, restoring the position exactly as it was before the move."""
+        if len(self.log) != 0: # Make sure there is a move to undo
+            move = self.log.pop()
+            castling, enpassant, turnsSinceCapture, pieceCaptured, _ = self.undoStack[len(self.log)]
+            self.clearSquare(move.endRow, move.endCol)
+            self.putPiece(move.pieceMoved, move.startRow, move.startCol)
+            if move.isEnPassant:
+                self.putPiece(pieceCaptured, move.startRow, move.endCol)
+            elif pieceCaptured != "--":
+                self.putPiece(pieceCaptured, move.endRow, move.endCol)
+            self.whiteMove = not self.whiteMove # Switch the turns back
+            self.hash ^= ZOBRIST_BLACK
+            if move.pieceMoved == "wK": # Update the location of the white king
+                self.wKlocation = SQUARES[move.startRow * 8 + move.startCol]
+            elif move.pieceMoved == "bK": # Update the location of the black king
+                self.bKlocation = SQUARES[move.startRow * 8 + move.startCol]
+            
+            if self.enpassant:
+                self.hash ^= ZOBRIST_ENPASSANT[self.enpassant[1]]
+            self.enpassant = enpassant
+            if self.enpassant:
+                self.hash ^= ZOBRIST_ENPASSANT[self.enpassant[1]]
+            
+            self.hash ^= ZOBRIST_CASTLING[self.currentCastling] ^ ZOBRIST_CASTLING[castling]
+            self.currentCastling = castling
+            self.turnsSinceCapture = turnsSinceCapture
+            
+            if move.isCastle:
+                match (move.endCol - move.startCol):
+                    case 2: # kingside/short castling
+                        self.moveRook(move.endRow, move.endCol - 1, move.endCol + 1)
+                    case _: # queenside/long castling
+                        self.moveRook(move.endRow, move.endCol + 1, move.endCol - 2)
+    
+    def moveRook(self, row, startCol, endCol):
+        """Move the rook involved in castling (or put it back when the castle is undone)"""
+        rook = self.board[row][startCol]
+        self.clearSquare(row, startCol)
+        self.putPiece(rook, row, endCol)
+    
+    def updateCastling(self, move):
+        """Update the castling rights if the given move was a king move or a rook move:
+        If the king or the rook was moved by <colour>,
+        then <colour>'s right to castle should be removed.
+        A rook being captured on its starting square also removes that right.
+        """
+        rights = self.currentCastling & CASTLING_MASK[move.startRow * 8 + move.startCol] & CASTLING_MASK[move.endRow * 8 + move.endCol]
+        if rights != self.currentCastling:
+            self.hash ^= ZOBRIST_CASTLING[self.currentCastling] ^ ZOBRIST_CASTLING[rights]
+            self.currentCastling = rights
+    
+    def getVMoves(self):
+        """Get all valid moves, considering checks, and set the checkmate and stalemate flags"""
+        moves = self.generateMoves(False)
+        if len(moves) == 0: # Checkmate or stalemate
+            self.checkmate, self.stalemate = (True, False) if self.inCheck() else (False, True)
+        else:
+            self.checkmate, self.stalemate = False, False
+        return moves
+    
+    def getCaptureMoves(self):
+        """Get the valid captures and queen promotions only (used by the quiescence search).
+        This does not change the checkmate and stalemate flags, since not every move is generated.
+        """
+        return self.generateMoves(True)
+    
+    def generateMoves(self, capturesOnly):
+        """Generate the valid moves (or only the valid captures and promotions), considering checks
+        1. Find the pieces giving check and the pieces pinned to the king
+        2. The king can only move to squares that are not attacked
+        3. If two pieces give check, only the king can move
+        4. If one piece gives check, the other pieces must capture it or block it
+        5. A pinned piece can only move along the line between the king and the pinning piece
+        """
+        colour, enemyColor = ("w", "b") if self.whiteMove else ("b", "w")
+        bitboards = self.bitboards
+        friendly = self.occupancy[colour]
+        enemy = self.occupancy[enemyColor]
+        occupied = friendly | enemy
+        kingRow, kingCol = self.wKlocation if self.whiteMove else self.bKlocation
+        king = kingRow * 8 + kingCol
+        targetSquares = enemy if capturesOnly else ~friendly
+        moves = []
+        
+        # King moves (the king is lifted off the board so it cannot shield itself from a slider)
+        withoutKing = occupied ^ (1 << king)
+        targets = KING_ATTACKS[king] & targetSquares
+        while targets:
+            lowest = targets & -targets
+            end = lowest.bit_length() - 1
+            if not self.isAttacked(end, enemyColor, withoutKing):
+                moves.append(Move((kingRow, kingCol), (end >> 3, end & 7), self.board))
+            targets ^= lowest
+        
+        checkers = self.attackersTo(king, enemyColor, occupied)
+        if checkers & (checkers - 1): # Double check, so only the king can move
+            return moves
+        if checkers:
+            mask = checkers | BETWEEN[king][checkers.bit_length() - 1]
+        else:
+            mask = FULL
+        pinned = self.getPinned(king, colour, enemyColor)
+        
+        # Knights, bishops, rooks and queens
+        for piece in ("N", "B", "R", "Q"):
+            pieces = bitboards[colour + piece]
+            while pieces:
+                lowest = pieces & -pieces
+                square = lowest.bit_length() - 1
+                pieces ^= lowest
+                match piece:
+                    case "N":
+                        if pinned & lowest: # A pinned knight can never move
+                            continue
+                        attacks = KNIGHT_ATTACKS[square]
+                    case "B":
+                        attacks = bishopAttacks(square, occupied)
+                    case "R":
+                        attacks = rookAttacks(square, occupied)
+                    case _:
+                        attacks = rookAttacks(square, occupied) | bishopAttacks(square, occupied)
+                targets = attacks & targetSquares & mask
+                if pinned & lowest:
+                    targets &= LINE[king][square]
+                self.addMoves(square >> 3, square & 7, targets, moves)
+        
+        # Pawns
+        forward, startRow = (-8, 6) if self.whiteMove else (8, 1)
+        promotions = "Q" if capturesOnly else "QRBN" # The quiescence search only looks at queen promotions
+        enpassant = self.enpassant[0] * 8 + self.enpassant[1] if self.enpassant else -1
+        pieces = bitboards[colour + "p"]
+        while pieces:
+            lowest = pieces & -pieces
+            square = lowest.bit_length() - 1
+            pieces ^= lowest
+            row, column = square >> 3, square & 7
+            allowed = mask & LINE[king][square] if pinned & lowest else mask
+            push = square + forward
+            if not occupied >> push & 1: # Advance pawns by 1 square
+                if allowed >> push & 1 and (not capturesOnly or push < 8 or push >= 56): # Pushes that promote count as captures
+                    self.addPawnMoves(row, column, 1 << push, moves, promotions)
+                if not capturesOnly and row == startRow and not occupied >> (push + forward) & 1 and allowed >> (push + forward) & 1: # Advance pawns by 2 squares
+                    moves.append(Move((row, column), ((push + forward) >> 3, column), self.board))
+            self.addPawnMoves(row, column, PAWN_ATTACKS[colour][square] & enemy & allowed, moves, promotions) # Captures
+            if enpassant >= 0 and PAWN_ATTACKS[colour][square] >> enpassant & 1:
+                # Make the capture on a copy of the occupancy, and check that no piece
+                # other than the captured pawn attacks the king afterwards
+                captured = 1 << (enpassant - forward)
+                after = (occupied ^ lowest ^ captured) | (1 << enpassant)
+                if not self.attackersTo(king, enemyColor, after) & ~captured:
+                    moves.append(Move((row, column), self.enpassant, self.board, isEnPassant = True))
+        
+        if not (checkers or capturesOnly):
+            self.getCastlingMoves(kingRow, kingCol, moves)
+        return moves
+    
+    def getPinned(self, king, colour, enemyColor):
+        """Bitboard of the friendly pieces pinned to the king on the given square"""
+        bitboards = self.bitboards
+        enemy = self.occupancy[enemyColor]
+        queens = bitboards[enemyColor + "Q"]
+        # Enemy sliders that would attack the king if none of our pieces were on the board
+        snipers = ((rookAttacks(king, enemy) & (bitboards[enemyColor + "R"] | queens)) |
+                   (bishopAttacks(king, enemy) & (bitboards[enemyColor + "B"] | queens)))
+        occupied = enemy | self.occupancy[colour]
+        pinned = 0
+        while snipers:
+            lowest = snipers & -snipers
+            blockers = BETWEEN[king][lowest.bit_length() - 1] & occupied
+            if blockers and not blockers & (blockers - 1): # Exactly one piece in between, and it is ours
+                pinned |= blockers
+            snipers ^= lowest
+        return pinned
+    
+    def attackersTo(self, square, enemyColor, occupied):
+        """Bitboard of the enemy pieces attacking a square, given which squares are occupied"""
+        bitboards = self.bitboards
+        queens = bitboards[enemyColor + "Q"]
+        return ((KNIGHT_ATTACKS[square] & bitboards[enemyColor + "N"]) |
+                (PAWN_ATTACKS["b" if enemyColor == "w" else "w"][square] & bitboards[enemyColor + "p"]) |
+                (KING_ATTACKS[square] & bitboards[enemyColor + "K"]) |
+                (rookAttacks(square, occupied) & (bitboards[enemyColor + "R"] | queens)) |
+                (bishopAttacks(square, occupied) & (bitboards[enemyColor + "B"] | queens)))
+    
+    def inCheck(self):
+        if self.whiteMove:
+            return self.squareAttacked(self.wKlocation[0], self.wKlocation[1])
+        else:
+            return self.squareAttacked(self.bKlocation[0], self.bKlocation[1])
+    
+    def squareAttacked(self, row, column):
+        """Check if the opponent attacks the square at (row, column)."""
+        return self.isAttacked(row * 8 + column, "b" if self.whiteMove else "w", self.occupancy["w"] | self.occupancy["b"])
+    
+    def isAttacked(self, square, enemyColor, occupied):
+        """Check if any piece of enemyColor attacks the square, given which squares are occupied.
+        Rather than generating the opponent's moves, look outward from the square:
+        a knight, king or pawn attacks it if one stands where that piece would be attacked from,
+        and a rook, bishop or queen attacks it if it is the first piece met along one of its rays.
+        """
+        bitboards = self.bitboards
+        if KNIGHT_ATTACKS[square] & bitboards[enemyColor + "N"]:
+            return True
+        if PAWN_ATTACKS["b" if enemyColor == "w" else "w"][square] & bitboards[enemyColor + "p"]:
+            return True
+        if KING_ATTACKS[square] & bitboards[enemyColor + "K"]:
+            return True
+        queens = bitboards[enemyColor + "Q"]
+        for directions, sliders in ((ROOK_DIRECTIONS, bitboards[enemyColor + "R"] | queens),
+                                    (BISHOP_DIRECTIONS, bitboards[enemyColor + "B"] | queens)):
+            if not sliders:
+                continue
+            for d in directions:
+                blockers = RAYS[d][square] & occupied
+                if blockers:
+                    if POSITIVE[d]:
+                        first = (blockers & -blockers).bit_length() - 1
+                    else:
+                        first = blockers.bit_length() - 1
+                    if sliders >> first & 1: # The first piece on this ray is an enemy slider
+                        return True
+        return False
+    
+    def getPMoves(self):
+        """Get all possible moves, without considering checks"""
+        moves = []
+        colour = "w" if self.whiteMove else "b"
+        for piece in ("p", "N", "B", "R", "Q", "K"):
+            pieces = self.bitboards[colour + piece]
+            while pieces: # Visit each piece of this type, lowest square first
+                lowest = pieces & -pieces
+                square = lowest.bit_length() - 1
+                self.functions[piece](square >> 3, square & 7, moves)
+                pieces ^= lowest
+        return moves
+    
+    def addMoves(self, row, column, targets, moves):
+        """Add a move from (row, column) to every square in the targets bitboard"""
+        while targets:
+            lowest = targets & -targets
+            end = lowest.bit_length() - 1
+            moves.append(Move((row, column), (end >> 3, end & 7), self.board))
+            targets ^= lowest
+    
+    def addPawnMoves(self, row, column, targets, moves, promotions = "QRBN"):
+        """Add a pawn move from (row, column) to every square in the targets bitboard,
+        with one move for each promotion piece when the pawn reaches the last rank
+        """
+        while targets:
+            lowest = targets & -targets
+            end = lowest.bit_length() - 1
+            if end < 8 or end >= 56:
+                for piece in promotions:
+                    moves.append(Move((row, column), (end >> 3, end & 7), self.board, promotionPiece = piece))
+            else:
+                moves.append(Move((row, column), (end >> 3, end & 7), self.board))
+            targets ^= lowest
+    
+    def getPawnMoves(self, row, column, moves):
+        square = row * 8 + column
+        occupied = self.occupancy["w"] | self.occupancy["b"]
+        if self.whiteMove: # It is white's turn, look at the white pawns
+            colour, enemyColor, forward, startRow = "w", "b", -1, 6
+        else:
+            colour, enemyColor, forward, startRow = "b", "w", 1, 1
+        if not occupied >> (square + forward * 8) & 1: # Advance pawns by 1 square
+            self.addPawnMoves(row, column, 1 << (square + forward * 8), moves)
+            if row == startRow and not occupied >> (square + forward * 16) & 1: # Advance pawns by 2 squares
+                moves.append(Move((row, column), (row + forward * 2, column), self.board))
+        self.addPawnMoves(row, column, PAWN_ATTACKS[colour][square] & self.occupancy[enemyColor], moves) # Captures
+        if self.enpassant and PAWN_ATTACKS[colour][square] >> (self.enpassant[0] * 8 + self.enpassant[1]) & 1:
+            moves.append(Move((row, column), self.enpassant, self.board, isEnPassant = True))
+                
+    def getRookMoves(self, row, column, moves):
+        friendly = self.occupancy["w" if self.whiteMove else "b"]
+        attacks = rookAttacks(row * 8 + column, self.occupancy["w"] | self.occupancy["b"])
+        self.addMoves(row, column, attacks & ~friendly, moves)
+                    
+    def getBishopMoves(self, row, column, moves):
+        friendly = self.occupancy["w" if self.whiteMove else "b"]
+        attacks = bishopAttacks(row * 8 + column, self.occupancy["w"] | self.occupancy["b"])
+        self.addMoves(row, column, attacks & ~friendly, moves)
+                
+    def getKnightMoves(self, row, column, moves):
+        friendly = self.occupancy["w" if self.whiteMove else "b"]
+        self.addMoves(row, column, KNIGHT_ATTACKS[row * 8 + column] & ~friendly, moves) # Enemy piece or empty square
+                    
+    def getQueenMoves(self, row, column, moves):
+        friendly = self.occupancy["w" if self.whiteMove else "b"]
+        occupied = self.occupancy["w"] | self.occupancy["b"]
+        attacks = rookAttacks(row * 8 + column, occupied) | bishopAttacks(row * 8 + column, occupied)
+        self.addMoves(row, column, attacks & ~friendly, moves)
+        
+    def getKingMoves(self, row, column, moves):
+        friendly = self.occupancy["w" if self.whiteMove else "b"]
+        self.addMoves(row, column, KING_ATTACKS[row * 8 + column] & ~friendly, moves) # Enemy piece or empty square
+    
+    def getCastlingMoves(self, row, column, moves):
+        """Generate valid castling moves for the king at (row, column)
+        There are two additional rules for castling (excluding the rules that the king and the rook must not have moved):
+        1. The king must not be in check
+        2. The king cannot pass through spaces under attack
+        """
+        
+        if self.squareAttacked(row, column):
+            return
+        if self.currentCastling & (CASTLE_WK if self.whiteMove else CASTLE_BK):
+            self.castleShort(row, column, moves)
+        if self.currentCastling & (CASTLE_WQ if self.whiteMove else CASTLE_BQ):
+            self.castleLong(row, column, moves)
+        
+    def castleShort(self, row, column, moves):
+        """Kingside castling, use alongside GameState.getCastlingMoves()"""
+        rooks = self.bitboards["wR" if self.whiteMove else "bR"]
+        if rooks >> (row * 8 + column + 3) & 1 and self.board[row][column + 1] == self.board[row][column + 2] == "--":
+            if not (self.squareAttacked(row, column + 1) or self.squareAttacked(row, column + 2)):
+                moves.append(Move( (row, column), (row, column + 2), self.board, isCastle=True ))
+    def castleLong(self, row, column, moves):
+        """Queenside castling, use alongside GameState.getCastlingMoves()"""
+        rooks = self.bitboards["wR" if self.whiteMove else "bR"]
+        if rooks >> (row * 8 + column - 4) & 1 and self.board[row][column - 1] == self.board[row][column - 2] == self.board[row][column - 3] == "--":
+            if not (self.squareAttacked(row, column - 1) or self.squareAttacked(row, column - 2)):
+                moves.append(Move( (row, column), (row, column - 2), self.board, isCastle=True ))
+    
+class Move():
+    # Converting ranks to rows, files to columns, and vice versa
+    rankstoRows = {'1':7, '2':6, '3':5, '4':4, '5':3, '6':2, '7':1, '8':0}
+    rowstoRanks = {v: k for k, v in rankstoRows.items()}
+    filestoCols = {'a':0, 'b':1, 'c':2, 'd':3, 'e':4, 'f':5, 'g':6, 'h':7}
+    colstoFiles = {v: k for k, v in filestoCols.items()}
+    promotionIndex = {"": 0, "Q": 0, "R": 1, "B": 2, "N": 3}
+    
+    # Millions of moves are created during a search, so each one stores its attributes in fixed slots
+    # instead of a per-instance dictionary
+    __slots__ = ("startRow", "startCol", "endRow", "endCol", "pieceMoved", "pieceCaptured", "ID",
+                 "isCapture", "isPromotion", "promotionPiece", "isEnPassant", "isCastle")
+    
+    def __init__(self, start, end, board, isEnPassant = False, isCastle = False, promotionPiece = "Q"):
+        self.startRow, self.startCol = start
+        self.endRow, self.endCol = end
+        self.pieceMoved = board[self.startRow][self.startCol]
+        self.pieceCaptured = board[self.endRow][self.endCol]
+        self.isCapture = self.pieceCaptured != "--"
+        
+        self.isPromotion = (self.pieceMoved == "wp" and self.endRow == 0) or (self.pieceMoved == "bp" and self.endRow == 7)
+        self.promotionPiece = promotionPiece if self.isPromotion else ""
+        # The ID packs the start square (bits 0-5), the end square (bits 6-11) and the promotion piece (bits 12-13).
+        # A queen promotion has the same ID as a click on the same squares.
+        self.ID = (self.startRow * 8 + self.startCol) | (self.endRow * 8 + self.endCol) << 6 | self.promotionIndex[self.promotionPiece] << 12
+        
+        self.isEnPassant = isEnPassant
+        if self.isEnPassant:
+            self.pieceCaptured = "wp" if self.pieceMoved == "bp" else "bp"
+        self.isCastle = isCastle
+
+    # Override the equals method
+    def __eq__(self, other):
+        if isinstance(other, Move):
+            return self.ID == other.ID
+        return NotImplemented
+    
+    def __hash__(self):
+        return self.ID
+    
+    # Override the str method
+    def __str__(self):
+        if self.isCastle: 
+            return "O-O" if self.endCol == 6 else "O-O-O"
+        
+        endSquare = self.getEndMove()
+        
+        if self.pieceMoved[1] == "p":
+            if self.isCapture:
+                moveString = self.colstoFiles[self.startCol] + "x" + endSquare
+            else:
+                moveString = endSquare
+            if self.isPromotion: # pawn promotions
+                moveString += "=" + self.promotionPiece
+            return moveString
+            
+        # Two of the same piece type moving to a square
+        
+        # Checks (+) and checkmates (#)
+        
+        # Piece moves
+        moveString = self.pieceMoved[1]
+        if self.isCapture:
+            moveString += "x"
+        return moveString + endSquare
+    
+    def getNotation(self):
+        # Make this look like real notation later
+        return self.getRF(self.startRow, self.startCol) + self.getRF(self.endRow, self.endCol) + self.promotionPiece.lower()
+    
+    def getEndMove(self):
+        """Convert an end coordinate into readable notation."""
+        return self.getRF(self.endRow, self.endCol)
+    
+    def getStartMove(self):
+        """Convert a start coordinate into readable notation."""
+        return self.getRF(self.startRow, self.startCol)
+    
+    def getRF(self, row, column):
+        """Get the rank and file of a square given its row and column."""
+        return self.colstoFiles[column] + self.rowstoRanks[row]
+
+"""
+
+Perft:
+This section of the code is responsible for checking the move generator without the GUI.
+Perft counts the leaf nodes of the move tree to a given depth, which can be compared with known results.
+Divide shows the count below each first move, which narrows a wrong count down to the move that causes it.
+
+"""
+
+STARTFEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# (name, FEN, [perft(1), perft(2), ...])
+PERFT_SUITE = [
+    ("Start position", STARTFEN, [20, 400, 8902, 197281, 4865609]),
+    ("Kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("Position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("Position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("Position 4 (mirrored)", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1", [6, 264, 9467, 422333]),
+    ("Position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("Position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+    ("Illegal en-passant (pin)", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1", [18, 92, 1670, 10138, 185429]),
+    ("Illegal en-passant (diagonal)", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1", [13, 102, 1266, 10276, 135655]),
+    ("En-passant gives check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1", [15, 126, 1928, 13931, 206379]),
+    ("Short castle gives check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1", [15, 66, 1198, 6399, 120330]),
+    ("Long castle gives check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1", [16, 71, 1286, 7418, 141077]),
+    ("Castling rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1", [26, 1141, 27826]),
+    ("Castling prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1", [44, 1494, 50509]),
+    ("Promote out of check", "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1", [11, 133, 1442, 19174, 266199]),
+    ("Discovered check", "8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1", [29, 165, 5160, 31961]),
+    ("Promote to give check", "4k3/1P6/8/8/8/8/K7/8 w - - 0 1", [9, 40, 472, 2661, 38983, 217342]),
+    ("Underpromote to give check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1", [6, 27, 273, 1329, 18135, 92683]),
+    ("Self stalemate", "K1k5/8/P7/8/8/8/8/8 w - - 0 1", [2, 6, 13, 63, 382, 2217]),
+    ("Stalemate and checkmate", "8/k1P5/8/1K6/8/8/8/8 w - - 0 1", [10, 25, 268, 926, 10857, 43261]),
+    ("Stalemate and checkmate (2)", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1", [37, 183, 6559, 23527]),
+]
+
+# (FEN, whether loadFEN() has to accept it) for the checks loadFEN() makes
+FEN_SUITE = [
+    ("rnbqkbnr/pppp1ppp/8/8/3Pp3/8/PPP1PPPP/RNBQKBNR b KQkq d3 0 2", True),
+    ("rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 2", True),
+    ("rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d3 0 2", False), # Rank 3 with white to move
+    ("rnbqkbnr/pppp1ppp/8/8/3Pp3/8/PPP1PPPP/RNBQKBNR b KQkq d6 0 2", False), # Rank 6 with black to move
+    ("rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2", False), # No black pawn on e5
+    ("rnbqkbnr/pppp1ppp/8/8/3Pp3/8/PPP1PPPP/RNBQKBNR b KQkq e3 0 2", False), # No white pawn on e4
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e9 0 1", False),
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0", False),
+]
+
+# (name, FEN, depth) of positions where every iteration of the search has to search more than the root
+SEARCH_SUITE = [
+    ("Queen against king", "k7/2Q5/8/8/8/8/8/4K3 w - - 0 1", 5),
+    ("Middlegame", "2r1kb1r/pQ1nppp1/5n2/3p3p/1PNP2bq/2P1B3/P3PPB1/1R2K1N1 b k - 0 18", 4),
+]
+
+def perft(state, depth):
+    """Count the leaf nodes of the move tree to the given depth."""
+    moves = state.getVMoves()
+    if depth <= 1: # Bulk counting: the moves at the last ply do not need to be made
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        state.makeMove(move)
+        nodes += perft(state, depth - 1)
+        state.undoMove()
+    return nodes
+
+def divide(state, depth):
+    """Return a list of (move notation, perft count below that move) for each valid move."""
+    results = []
+    for move in state.getVMoves():
+        state.makeMove(move)
+        results.append((move.getNotation(), perft(state, depth - 1)))
+        state.undoMove()
+    return results
+
+def runPerft(fen, depth, showDivide=False):
+    """Run perft (or divide) on a position and print the node count and speed."""
+    state = GameState(fen)
+    start = perf_counter()
+    if showDivide:
+        results = divide(state, depth)
+        for notation, count in sorted(results):
+            print(f"{notation}: {count}")
+        nodes = sum(count for notation, count in results)
+    else:
+        nodes = perft(state, depth)
+    elapsed = perf_counter() - start
+    print(f"\nDepth {depth}: {nodes} nodes in {elapsed:.2f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/s)")
+    return nodes
+
+def runPerftSuite(maxDepth):
+    """Run every position in PERFT_SUITE up to maxDepth and compare with the known counts.
+    Returns True if every count matched.
+    """
+    totalNodes = 0
+    failures = 0
+    start = perf_counter()
+    for name, fen, counts in PERFT_SUITE:
+        state = GameState(fen)
+        for depth in range(1, min(maxDepth, len(counts)) + 1):
+            positionStart = perf_counter()
+            nodes = perft(state, depth)
+            elapsed = perf_counter() - positionStart
+            totalNodes += nodes
+            status = "ok" if nodes == counts[depth - 1] else f"FAILED (expected {counts[depth - 1]})"
+            failures += nodes != counts[depth - 1]
+            print(f"{name:32} depth {depth}: {nodes:>9} {status:8} {nodes / max(elapsed, 1e-9):>9.0f} nodes/s")
+    elapsed = perf_counter() - start
+    print(f"\n{failures} failed, {totalNodes} nodes in {elapsed:.2f}s ({totalNodes / max(elapsed, 1e-9):.0f} nodes/s)")
+    return failures == 0
+
+def runSearchSuite():
+    """Search every position in SEARCH_SUITE, and check that no iteration ended at the root.
+    The checkmate and stalemate flags are left set, as a checkmate or stalemate found deep in an earlier search
+    would leave them, and the principal variation is looked up after each iteration, as the UCI engine does.
+    Returns True if every iteration searched more than one node.
+    """
+    failures = 0
+    for name, fen, depth in SEARCH_SUITE:
+        state = GameState(fen)
+        valid = state.getVMoves()
+        state.checkmate = state.stalemate = True
+        search = searchPosition(state, valid, depth, workers=1,
+                                onIteration=lambda search: findPrincipalVariation(state, search.bestMove, search.depth))
+        nodes = [iteration["nodes"] for iteration in search.iterations]
+        ok = len(nodes) == depth and min(nodes) > 1
+        failures += not ok
+        print(f"{name:32} depth {depth}: {'ok' if ok else 'FAILED'} (nodes per iteration: {nodes})")
+    return failures == 0
+
+def runFENCheck():
+    """Load every FEN in FEN_SUITE, and check that loadFEN() accepts the valid ones (which getFEN() has to give back)
+    and raises ValueError for the others.
+    Returns True if every FEN was handled as expected.
+    """
+    failures = 0
+    for fen, valid in FEN_SUITE:
+        try:
+            ok = GameState(fen).getFEN() == fen and valid
+        except ValueError:
+            ok = not valid
+        failures += not ok
+        if not ok:
+            print(f"FEN check FAILED: {fen}")
+    print(f"{'FEN check':32} {'ok' if not failures else 'FAILED'} ({len(FEN_SUITE)} positions)")
+    return failures == 0
+
+def runEvaluationCheck():
+    """Check that DEBUG_EVAL makes the search recompute the evaluation: a search with a wrong incremental score
+    has to fail the check, and a search with the right one has to pass it.
+    Returns True if both did.
+    """
+    global DEBUG_EVAL
+    if not __debug__:
+        print("Evaluation check: skipped (assertions are disabled)")
+        return True
+    results = []
+    debugEval = DEBUG_EVAL
+    DEBUG_EVAL = True
+    try:
+        for offset in (100, 0):
+            state = GameState()
+            state.mgScore += offset
+            transTable.clear() # So that the leaves are searched, not looked up
+            try:
+                searchPosition(state, state.getVMoves(), 2, workers=1)
+                results.append(True)
+            except AssertionError:
+                results.append(False)
+    finally:
+        DEBUG_EVAL = debugEval
+    ok = results == [False, True]
+    print(f"{'Evaluation check':32} {'ok' if ok else 'FAILED'}")
+    return ok
+
+"""
+UCI:
+The Universal Chess Interface lets chess GUIs and tournament managers use the AI without opening any windows.
+Commands are read from stdin while "go" searches in a background thread, so that "stop", "isready" and "quit"
+are answered straight away, even in the middle of a search.
+"""
+UCI_NAME = "PyChess"
+UCI_AUTHOR = "commandcontrolQ"
+UCI_MOVES_TO_GO = 30 # Moves the remaining clock time is shared between when the GUI does not send movestogo
+UCI_GO_OPTIONS = ("depth", "movetime", "wtime", "btime", "winc", "binc", "movestogo", "nodes")
+
+class UCIEngine():
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.outputLock = threading.Lock() # The search thread and the command loop both write to the output
+        self.state = GameState()
+        self.workers = WORKERS
+        self.ownBook = True
+        self.searchThread = None
+        self.cancelToken = threading.Event()
+    
+    def send(self, line):
+        with self.outputLock:
+            self.output.write(line + "\n")
+            self.output.flush()
+    
+    def run(self, commands=sys.stdin):
+        """Answer commands until "quit" or the end of the input"""
+        for line in commands:
+            if not self.command(line.split()):
+                break
+        self.stop()
+    
+    def command(self, words):
+        """Handle one command. Returns False for "quit". Unknown commands are ignored, as the protocol asks."""
+        if not words:
+            return True
+        name, args = words[0], words[1:]
+        if name == "uci":
+            self.send(f"id name {UCI_NAME}")
+            self.send(f"id author {UCI_AUTHOR}")
+            self.send(f"option name Hash type spin default {TT_SIZE_MB} min 1 max 4096")
+            self.send(f"option name Threads type spin default {self.workers} min 1 max {os.cpu_count() or 1}")
+            self.send("option name OwnBook type check default true")
+            self.send("uciok")
+        elif name == "isready":
+            self.send("readyok")
+        elif name == "setoption":
+            self.stop()
+            self.setOption(args)
+        elif name == "ucinewgame":
+            self.stop()
+            transTable.clear()
+            HISTORY.clear()
+        elif name == "position":
+            self.stop()
+            self.setPosition(args)
+        elif name == "go":
+            self.stop()
+            self.go(args)
+        elif name == "stop":
+            self.stop()
+        elif name == "quit":
+            return False
+        return True
+    
+    def setOption(self, args):
+        """setoption name <name> value <value>"""
+        global transTable
+        if "name" not in args or "value" not in args:
+            return
+        name = " ".join(args[args.index("name") + 1:args.index("value")]).lower()
+        value = " ".join(args[args.index("value") + 1:])
+        try:
+            if name == "hash":
+                transTable = TranspositionTable(max(int(value), 1))
+            elif name == "threads":
+                self.workers = max(int(value), 1)
+            elif name == "ownbook":
+                self.ownBook = value.lower() == "true"
+        except ValueError:
+            self.send(f"info string invalid value for {name}: {value}")
+    
+    def setPosition(self, args):
+        """position [startpos | fen <FEN>] [moves <move> ...]
+        An invalid FEN or an illegal move rejects the whole command, and the previous position is kept.
+        """
+        moves = args[args.index("moves") + 1:] if "moves" in args else []
+        setup = args[:args.index("moves")] if "moves" in args else args
+        state = GameState()
+        if setup[:1] == ["fen"]:
+            try:
+                state.loadFEN(" ".join(setup[1:]))
+            except ValueError:
+                self.send(f"info string invalid FEN: {' '.join(setup[1:])}")
+                return
+        for notation in moves:
+            move = next((move for move in state.getVMoves() if move.getNotation() == notation), None)
+            if move is None:
+                self.send(f"info string illegal move: {notation}")
+                return
+            state.makeMove(move)
+        self.state = state
+    
+    def go(self, args):
+        """go [depth N] [movetime MS] [wtime MS] [btime MS] [winc MS] [binc MS] [movestogo N] [nodes N] [infinite]"""
+        limits = {}
+        for i, word in enumerate(args[:-1]):
+            if word in UCI_GO_OPTIONS:
+                try:
+                    limits[word] = int(args[i + 1])
+                except ValueError:
+                    pass
+        
+        timeLimit = None
+        clock = limits.get("wtime" if self.state.whiteMove else "btime")
+        if "movetime" in limits:
+            timeLimit = limits["movetime"] / 1000
+        elif clock is not None:
+            increment = limits.get("winc" if self.state.whiteMove else "binc", 0)
+            # Use a share of the remaining time, but never more than half of it
+            timeLimit = min(clock / limits.get("movestogo", UCI_MOVES_TO_GO) + increment * 3 / 4, clock / 2) / 1000
+        depth = limits.get("depth")
+        nodeLimit = limits.get("nodes")
+        infinite = "infinite" in args or (depth is None and timeLimit is None and nodeLimit is None)
+        if infinite:
+            depth = MAX_PLY - 1
+        
+        self.cancelToken.clear()
+        self.searchThread = threading.Thread(target=self.think, args=(depth, timeLimit, nodeLimit, infinite), daemon=True)
+        self.searchThread.start()
+    
+    def think(self, depth, timeLimit, nodeLimit, infinite):
+        """Search the current position in the background, and send the best move when it is done"""
+        valid = self.state.getVMoves()
+        move = findBookMove(self.state, valid) if self.ownBook else None
+        if move is not None:
+            if infinite:
+                self.cancelToken.wait()
+            self.send(f"bestmove {move.getNotation()}")
+            return
+        search = searchPosition(self.state, valid, depth, timeLimit, nodeLimit, self.workers, self.cancelToken, self.sendInfo)
+        if infinite: # The protocol only allows bestmove after "stop", even if the search finished by itself
+            self.cancelToken.wait()
+        move = search.bestMove if search.bestMove is not None else (valid[0] if valid else None)
+        self.send("bestmove " + (move.getNotation() if move is not None else "0000"))
+    
+    def sendInfo(self, search):
+        """Report a completed iteration"""
+        elapsed = perf_counter() - search.started
+        if abs(search.score) >= MATE_BOUND:
+            plies = CHECKMATE - abs(search.score)
+            score = f"mate {(plies + 1) // 2 if search.score > 0 else -(plies // 2)}"
+        else:
+            score = f"cp {search.score}"
+        line = findPrincipalVariation(self.state, search.bestMove, search.depth)
+        self.send(f"info depth {search.depth} score {score} nodes {search.nodes} nps {int(search.nodes / max(elapsed, 1e-9))} "
+                  f"time {int(elapsed * 1000)} pv {' '.join(move.getNotation() for move in line)}")
+    
+    def stop(self):
+        """Stop the running search (if there is one), which then sends its best move"""
+        if self.searchThread is not None:
+            self.cancelToken.set()
+            self.searchThread.join()
+            self.searchThread = None
+
+"""
+PGN:
+Portable Game Notation, the usual file format for chess games. Moves are written in Standard Algebraic Notation (SAN),
+which needs the other valid moves to know when a move has to say which piece is moving (e.g. "Nbd7").
+
+readPGN() goes through a file one game at a time, so archives of any size can be replayed in constant memory.
+mapPGN() does the same with the games shared out between worker processes.
+"""
+PGN_LINE_LENGTH = 80
+PGN_RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+PGN_TAG = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+PGN_TOKEN = re.compile(r"\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|[^\s(){};]+") # Comments, variations, NAGs and everything else
+SAN_MOVE = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+
+def getSAN(state, move, valid):
+    """The SAN of a move that is in valid (the valid moves of the state), such as "Nbd7", "exd6", "e8=Q+" or "O-O#"."""
+    if move.isCastle:
+        san = "O-O" if move.endCol == 6 else "O-O-O"
+    elif move.pieceMoved[1] == "p":
+        san = (move.colstoFiles[move.startCol] + "x" if move.isCapture or move.isEnPassant else "") + move.getEndMove()
+        if move.isPromotion:
+            san += "=" + move.promotionPiece
+    else:
+        san = move.pieceMoved[1]
+        others = [other for other in valid if other.pieceMoved == move.pieceMoved and other.ID != move.ID
+                  and (other.endRow, other.endCol) == (move.endRow, move.endCol)]
+        if others:
+            if all(other.startCol != move.startCol for other in others):
+                san += move.colstoFiles[move.startCol]
+            elif all(other.startRow != move.startRow for other in others):
+                san += move.rowstoRanks[move.startRow]
+            else:
+                san += move.getStartMove()
+        san += ("x" if move.isCapture else "") + move.getEndMove()
+    state.makeMove(move)
+    if state.inCheck(): # generateMoves() is used because getVMoves() would change the checkmate flag
+        san += "+" if state.generateMoves(False) else "#"
+    state.undoMove()
+    return san
+
+def parseSAN(state, san, valid):
+    """Find the move in valid (the valid moves of the state) that a SAN string describes.
+    Raises ValueError if the SAN does not describe exactly one valid move.
+    """
+    text = san.rstrip("+#!?")
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        candidates = [move for move in valid if move.isCastle and move.endCol == (6 if len(text) == 3 else 2)]
+    else:
+        match = SAN_MOVE.match(text)
+        if match is None:
+            raise ValueError(f"Not a SAN move: {san!r}")
+        piece, fromFile, fromRank, target, promotion = match.groups()
+        piece = piece or "p"
+        endRow, endCol = Move.rankstoRows[target[1]], Move.filestoCols[target[0]]
+        candidates = [move for move in valid if move.pieceMoved[1] == piece and not move.isCastle
+                      and move.endRow == endRow and move.endCol == endCol
+                      and (fromFile is None or move.startCol == Move.filestoCols[fromFile])
+                      and (fromRank is None or move.startRow == Move.rankstoRows[fromRank])
+                      and move.promotionPiece == (promotion or ("Q" if move.isPromotion else ""))]
+    if len(candidates) != 1:
+        raise ValueError(f"{san!r} is {'ambiguous' if candidates else 'not a valid move'} in {state.getFEN()}")
+    return candidates[0]
+
+def splitPGN(lines):
+    """Yield the text of each game in a PGN file (or any iterable of lines), one game at a time"""
+    game = []
+    inMoves = False # Whether the movetext of the current game has started
+    braces = 0 # Comments can span lines, and a line inside one that starts with "[" is not a tag
+    for line in lines:
+        if not braces and line.startswith("[") and inMoves:
+            yield "".join(game)
+            game, inMoves = [], False
+        if not braces and not line.startswith("[") and line.strip():
+            inMoves = True
+        braces = max(braces + line.count("{") - line.count("}"), 0)
+        game.append(line)
+    if any(line.strip() for line in game):
+        yield "".join(game)
+
+def parsePGNGame(text):
+    """Turn the text of one game into (tags, moves, result), with the moves resolved to Move objects.
+    If a move can not be read, the moves before it are returned, and the reason is put in tags["Error"].
+    If the FEN tag can not be read, no moves are returned, and the reason is put in tags["Error"] the same way.
+    """
+    tags = {}
+    movetext = []
+    for line in text.splitlines():
+        match = PGN_TAG.match(line) if line.startswith("[") and not movetext else None
+        if match is not None:
+            tags[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+        else:
+            movetext.append(line)
+    
+    moves = []
+    result = tags.get("Result", "*")
+    try:
+        state = GameState(tags.get("FEN"))
+    except ValueError as error: # One bad game should not stop a whole file from being read
+        tags["Error"] = str(error)
+        return tags, moves, result
+    variations = 0
+    for token in PGN_TOKEN.findall("\n".join(movetext)):
+        if token == "(":
+            variations += 1
+        elif token == ")":
+            variations = max(variations - 1, 0)
+        elif variations or token[0] in "{;$":
+            continue
+        elif token in PGN_RESULTS:
+            result = token
+        else:
+            san = re.sub(r"^\d+\.*", "", token) # Move numbers, which may be joined to the move ("1.e4")
+            if not san:
+                continue
+            try:
+                move = parseSAN(state, san, state.getVMoves())
+            except ValueError as error:
+                tags["Error"] = str(error)
+                break
+            state.makeMove(move)
+            moves.append(move)
+    return tags, moves, result
+
+def readPGN(lines):
+    """Yield (tags, moves, result) for each game in a PGN file (or any iterable of lines). See parsePGNGame()."""
+    for text in splitPGN(lines):
+        yield parsePGNGame(text)
+
+def mapPGN(lines, function, workers=None, batchSize=64):
+    """Yield function(tags, moves, result) for each game in a PGN file, in order, with the games parsed and passed
+    to function in worker processes. function has to be defined at the top level of a module, so that the workers
+    can find it. Only a few batches of games are read ahead of the results, so memory use stays the same for any file size.
+    """
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        pending = []
+        batch = []
+        for text in splitPGN(lines):
+            batch.append(text)
+            if len(batch) == batchSize:
+                pending.append(executor.submit(mapPGNBatch, function, batch))
+                batch = []
+                if len(pending) > workers * 2: # Keep every worker busy, but do not read the whole file ahead
+                    yield from pending.pop(0).result()
+        if batch:
+            pending.append(executor.submit(mapPGNBatch, function, batch))
+        for future in pending:
+            yield from future.result()
+
+def mapPGNBatch(function, texts):
+    """Runs in a worker process for mapPGN()"""
+    return [function(*parsePGNGame(text)) for text in texts]
+
+def summarisePGNGame(tags, moves, result):
+    """The statistics that runPGNStats() collects for each game"""
+    return result, len(moves), tags.get("Error")
+
+def runPGNStats(path, workers=1):
+    """Replay every game of a PGN file through GameState and print how many games, moves, results and errors it has"""
+    games = plies = errors = 0
+    results = dict.fromkeys(PGN_RESULTS, 0)
+    start = perf_counter()
+    with open(path, encoding="utf-8", errors="replace") as file:
+        if workers > 1:
+            summaries = mapPGN(file, summarisePGNGame, workers)
+        else:
+            summaries = (summarisePGNGame(*game) for game in readPGN(file))
+        for result, length, error in summaries:
+            games += 1
+            plies += length
+            results[result] = results.get(result, 0) + 1
+            if error is not None:
+                errors += 1
+                print(f"Game {games}: {error}")
+    elapsed = perf_counter() - start
+    print(f"\n{games} games, {plies} moves replayed in {elapsed:.2f}s ({games / max(elapsed, 1e-9):.0f} games/s, "
+          f"{plies / max(elapsed, 1e-9):.0f} moves/s)")
+    print("Results: " + ", ".join(f"{result} {count}" for result, count in results.items()) + f", errors {errors}")
+
+def formatPGN(tags, sanMoves, result, firstMove=1, whiteFirst=True):
+    """Write a game as PGN text. tags is a dictionary of tag names and values, in the order they are written."""
+    lines = [f'[{name} "{value}"]' for name, value in tags.items()]
+    lines.append("")
+    tokens = []
+    for i, san in enumerate(sanMoves):
+        ply = i + (0 if whiteFirst else 1)
+        if ply % 2 == 0:
+            tokens.append(f"{firstMove + ply // 2}.")
+        elif i == 0:
+            tokens.append(f"{firstMove}...")
+        tokens.append(san)
+    tokens.append(result)
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > PGN_LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n\n"
+
+"""
+Self-play tournament:
+Two sets of engine settings (A and B) play each other without the GUI, with several games running at once in a
+process pool. Each opening is played twice, so that A and B both get to play it as white. Finished games are written
+to a PGN file straight away, so a long run can be followed (or stopped) at any time.
+
+Engine settings are written as "depth=3", "time=0.5" (seconds per move), "nodes=20000", or combined
+with commas, such as "depth=6,time=1".
+"""
+MAX_GAME_PLIES = 1000 # Games that reach this length are adjudicated as draws
+ENGINE_SETTINGS = {"depth": ("depth", int), "time": ("timeLimit", float), "nodes": ("nodeLimit", int)}
+
+def parseEngineSettings(text):
+    """Turn "depth=3,time=0.5" into findBestMove() arguments. Raises ValueError for anything else."""
+    settings = {}
+    for part in filter(None, text.split(",")):
+        name, _, value = part.partition("=")
+        if name.strip() not in ENGINE_SETTINGS:
+            raise ValueError(f"Unknown engine setting {name.strip()!r} (use {', '.join(ENGINE_SETTINGS)})")
+        argument, kind = ENGINE_SETTINGS[name.strip()]
+        settings[argument] = kind(value)
+    return settings
+
+def loadOpenings(path):
+    """Read an openings file: one opening per line, either a FEN or moves from the start position in the notation
+    of Move.getNotation() (e.g. "e2e4 e7e5 g1f3"). Returns a list of (FEN or None, [moves]).
+    """
+    openings = []
+    with open(path) as file:
+        for line in file:
+            line = line.split("#")[0].strip()
+            if line:
+                openings.append((line, []) if "/" in line else (None, line.split()))
+    return openings
+
+def randomOpening(plies, rng):
+    """Play random valid moves from the start position and return them as an opening (None, [moves])"""
+    state = GameState()
+    moves = []
+    for _ in range(plies):
+        valid = state.getVMoves()
+        if not valid:
+            break
+        move = valid[rng.randrange(len(valid))]
+        moves.append(move.getNotation())
+        state.makeMove(move)
+    return None, moves
+
+def playSelfPlayGame(opening, whiteSettings, blackSettings, bookFile):
+    """Play one game between two engine settings and return (result, reason, plies, PGN movetext data).
+    Each side has its own transposition table and history, as two separate engines would.
+    Both sides use the opening book in bookFile (or none, if it is None) after the opening.
+    """
+    global transTable, HISTORY, BOOK_FILE
+    BOOK_FILE = bookFile
+    fen, openingMoves = opening
+    state = GameState(fen)
+    firstMove, whiteFirst = state.startPly // 2 + 1, state.whiteMove
+    engines = {True: (TranspositionTable(), {}, whiteSettings), False: (TranspositionTable(), {}, blackSettings)}
+    sanMoves = []
+    
+    while True:
+        valid = state.getVMoves()
+        if state.checkmate:
+            result, reason = ("0-1" if state.whiteMove else "1-0"), "checkmate"
+            break
+        elif state.stalemate:
+            result, reason = "1/2-1/2", "stalemate"
+            break
+        elif state.turnsSinceCapture >= 100:
+            result, reason = "1/2-1/2", "50-move rule"
+            break
+        elif len(sanMoves) >= MAX_GAME_PLIES:
+            result, reason = "1/2-1/2", f"adjudicated after {MAX_GAME_PLIES} plies"
+            break
+        
+        if len(sanMoves) < len(openingMoves):
+            move = next((move for move in valid if move.getNotation() == openingMoves[len(sanMoves)]), None)
+            if move is None:
+                raise ValueError(f"Opening move {openingMoves[len(sanMoves)]!r} is not valid")
+        else:
+            transTable, HISTORY, settings = engines[state.whiteMove]
+            move = findBestMove(state, valid, workers=1, **settings)
+            if move is None:
+                move = findRandomMove(valid)
+        sanMoves.append(getSAN(state, move, valid))
+        state.makeMove(move)
+    return result, reason, len(sanMoves), (sanMoves, firstMove, whiteFirst)
+
+def runTournament(games, settingsA, settingsB, pgnPath, concurrency=None, openings=None, randomPlies=0, seed=None):
+    """Play games between settings A and B in a process pool, write them to pgnPath as they finish, and print the
+    running score. openings is a list from loadOpenings(); without it, each pair of games starts with randomPlies
+    random moves (or from the start position). Returns A's (wins, draws, losses).
+    """
+    rng = random.Random(seed)
+    nameA, nameB = "PyChess " + formatSettings(settingsA), "PyChess " + formatSettings(settingsB)
+    if nameA == nameB:
+        nameA, nameB = nameA + " (A)", nameB + " (B)"
+    context = multiprocessing.get_context("spawn")
+    wins = draws = losses = 0
+    start = perf_counter()
+    with ProcessPoolExecutor(concurrency or os.cpu_count() or 1, mp_context=context) as executor, open(pgnPath, "a") as pgnFile:
+        futures = {}
+        opening = None
+        for game in range(games):
+            if game % 2 == 0: # Both games of a pair use the same opening
+                opening = openings[(game // 2) % len(openings)] if openings else randomOpening(randomPlies, rng)
+            aIsWhite = game % 2 == 0
+            white, black = (settingsA, settingsB) if aIsWhite else (settingsB, settingsA)
+            futures[executor.submit(playSelfPlayGame, opening, white, black, BOOK_FILE)] = (game, opening, aIsWhite)
+        
+        for finished, future in enumerate(as_completed(futures), 1):
+            game, opening, aIsWhite = futures[future]
+            result, reason, plies, (sanMoves, firstMove, whiteFirst) = future.result()
+            tags = {"Event": "PyChess self-play", "Site": "?", "Date": strftime("%Y.%m.%d"), "Round": game + 1,
+                    "White": nameA if aIsWhite else nameB, "Black": nameB if aIsWhite else nameA, "Result": result}
+            if opening[0] is not None:
+                tags.update(SetUp="1", FEN=opening[0])
+            tags["Termination"] = reason
+            pgnFile.write(formatPGN(tags, sanMoves, result, firstMove, whiteFirst))
+            pgnFile.flush()
+            
+            aScore = {"1-0": 1, "0-1": 0}.get(result, 0.5)
+            if not aIsWhite:
+                aScore = 1 - aScore
+            wins, draws, losses = wins + (aScore == 1), draws + (aScore == 0.5), losses + (aScore == 0)
+            elapsed = perf_counter() - start
+            print(f"Game {game + 1:>4} ({finished}/{games}): {tags['White']} vs {tags['Black']} {result} by {reason} "
+                  f"after {plies} plies | A +{wins} ={draws} -{losses} | {finished / elapsed * 3600:.0f} games/hour", flush=True)
+    
+    elapsed = perf_counter() - start
+    score = (wins + draws / 2) / games * 100 if games else 0
+    print(f"\nA: {nameA}\nB: {nameB}")
+    print(f"A won {wins}, drew {draws} and lost {losses} ({score:.1f}%) in {elapsed:.0f}s ({games / max(elapsed, 1e-9) * 3600:.0f} games/hour)")
+    return wins, draws, losses
+
+def formatSettings(settings):
+    """The reverse of parseEngineSettings(), used to name the players in the PGN file"""
+    names = {argument: name for name, (argument, kind) in ENGINE_SETTINGS.items()}
+    return ",".join(f"{names[argument]}={value}" for argument, value in settings.items()) or f"depth={DEPTH}"
+
+"""
+EPD:
+Extended Position Description files hold test positions, one per line: the first four fields of a FEN, followed by
+operations such as bm (best move), am (avoid move) and id, e.g.
+    2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - bm Qg6; id "WAC.001";
+runEPD() searches every position in a process pool and counts it as solved if the AI plays one of the bm moves
+(and none of the am moves).
+"""
+def parseEPD(line):
+    """Split an EPD line into (FEN, {opcode: [operands]}). Returns None for blank lines and comments."""
+    fields = line.split(None, 4)
+    if len(fields) < 4 or line.lstrip().startswith("#"):
+        return None
+    operations = {}
+    for operation in (fields[4] if len(fields) > 4 else "").split(";"):
+        words = operation.split()
+        if words:
+            operations[words[0]] = [word.strip('"') for word in words[1:]]
+    return " ".join(fields[:4]), operations
+
+def solveEPDPosition(fen, timeLimit):
+    """Search one EPD position in a worker process and return (SAN of the move found, depth reached, nodes)"""
+    transTable.clear() # Positions are unrelated, so each one starts with an empty table like it would on its own
+    state = GameState(fen)
+    valid = state.getVMoves()
+    search = iterativeDeepening(state, valid, timeLimit=timeLimit)
+    return (getSAN(state, search.bestMove, valid) if search.bestMove is not None else "-"), search.depth, search.nodes
+
+def runEPD(path, timeLimit, concurrency=None):
+    """Run the positions of an EPD file with timeLimit seconds each, print each result and the solve rate.
+    Returns (solved, total).
+    """
+    positions = []
+    with open(path) as file:
+        for line in file:
+            parsed = parseEPD(line)
+            if parsed is not None and ("bm" in parsed[1] or "am" in parsed[1]):
+                positions.append(parsed)
+    
+    def strip(san): # Suites differ in whether they mark checks
+        return san.rstrip("+#!?")
+    
+    solved = 0
+    start = perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(concurrency or os.cpu_count() or 1, mp_context=context) as executor:
+        futures = [executor.submit(solveEPDPosition, fen, timeLimit) for fen, operations in positions]
+        for number, ((fen, operations), future) in enumerate(zip(positions, futures), 1):
+            san, depth, nodes = future.result()
+            ok = (strip(san) in map(strip, operations.get("bm", [san]))) and strip(san) not in map(strip, operations.get("am", []))
+            solved += ok
+            name = " ".join(operations.get("id", [])) or f"#{number}"
+            expected = ("bm " + " ".join(operations["bm"])) if "bm" in operations else ("am " + " ".join(operations["am"]))
+            print(f"{name:16} {'ok' if ok else 'FAILED':6} played {san:8} {expected:20} depth {depth:>2} {nodes:>9} nodes", flush=True)
+    elapsed = perf_counter() - start
+    print(f"\nSolved {solved} of {len(positions)} ({solved / max(len(positions), 1) * 100:.1f}%) in {elapsed:.1f}s "
+          f"({timeLimit}s per position)")
+    return solved, len(positions)
+
+"""
+Opening book:
+Books are in the Polyglot format (.bin), which most chess programs can read and write. A book is a list of 16-byte
+entries, sorted by key: the position's key, a move and a weight (how often the move should be picked), big-endian.
+The file is memory-mapped rather than read in, so a book of any size opens instantly, and the entries of a position
+are found with a binary search on its key.
+
+Polyglot keys are made like GameState.getHash(), but with the random numbers from the Polyglot specification,
+so books made by other programs can be used.
+"""
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin") # None turns the book off
+BOOK_ENTRY = struct.Struct(">QHHI") # Key, move, weight, learn
+BOOK_PLIES = 20 # How many moves of each game buildBook() adds to the book
+POLYGLOT_PIECES = {"bp": 0, "wp": 1, "bN": 2, "wN": 3, "bB": 4, "wB": 5, "bR": 6, "wR": 7, "bQ": 8, "wQ": 9, "bK": 10, "wK": 11}
+POLYGLOT_PROMOTIONS = {"": 0, "N": 1, "B": 2, "R": 3, "Q": 4}
+POLYGLOT_RANDOM = [ # 768 piece-square keys, 4 castling keys, 8 en-passant file keys and the white-to-move key
+    0x9D39247E33776D41, 0x2AF7398005AAA5C7, 0x44DB015024623547, 0x9C15F73E62A76AE2,
+    0x75834465489C0C89, 0x3290AC3A203001BF, 0x0FBBAD1F61042279, 0xE83A908FF2FB60CA,
+    0x0D7E765D58755C10, 0x1A083822CEAFE02D, 0x9605D5F0E25EC3B0, 0xD021FF5CD13A2ED5,
+    0x40BDF15D4A672E32, 0x011355146FD56395, 0x5DB4832046F3D9E5, 0x239F8B2D7FF719CC,
+    0x05D1A1AE85B49AA1, 0x679F848F6E8FC971, 0x7449BBFF801FED0B, 0x7D11CDB1C3B7ADF0,
+    0x82C7709E781EB7CC, 0xF3218F1C9510786C, 0x331478F3AF51BBE6, 0x4BB38DE5E7219443,
+    0xAA649C6EBCFD50FC, 0x8DBD98A352AFD40B, 0x87D2074B81D79217, 0x19F3C751D3E92AE1,
+    0xB4AB30F062B19ABF, 0x7B0500AC42047AC4, 0xC9452CA81A09D85D, 0x24AA6C514DA27500,
+    0x4C9F34427501B447, 0x14A68FD73C910841, 0xA71B9B83461CBD93, 0x03488B95B0F1850F,
+    0x637B2B34FF93C040, 0x09D1BC9A3DD90A94, 0x3575668334A1DD3B, 0x735E2B97A4C45A23,
+    0x18727070F1BD400B, 0x1FCBACD259BF02E7, 0xD310A7C2CE9B6555, 0xBF983FE0FE5D8244,
+    0x9F74D14F7454A824, 0x51EBDC4AB9BA3035, 0x5C82C505DB9AB0FA, 0xFCF7FE8A3430B241,
+    0x3253A729B9BA3DDE, 0x8C74C368081B3075, 0xB9BC6C87167C33E7, 0x7EF48F2B83024E20,
+    0x11D505D4C351BD7F, 0x6568FCA92C76A243, 0x4DE0B0F40F32A7B8, 0x96D693460CC37E5D,
+    0x42E240CB63689F2F, 0x6D2BDCDAE2919661, 0x42880B0236E4D951, 0x5F0F4A5898171BB6,
+    0x39F890F579F92F88, 0x93C5B5F47356388B, 0x63DC359D8D231B78, 0xEC16CA8AEA98AD76,
+    0x5355F900C2A82DC7, 0x07FB9F855A997142, 0x5093417AA8A7ED5E, 0x7BCBC38DA25A7F3C,
+    0x19FC8A768CF4B6D4, 0x637A7780DECFC0D9, 0x8249A47AEE0E41F7, 0x79AD695501E7D1E8,
+    0x14ACBAF4777D5776, 0xF145B6BECCDEA195, 0xDABF2AC8201752FC, 0x24C3C94DF9C8D3F6,
+    0xBB6E2924F03912EA, 0x0CE26C0B95C980D9, 0xA49CD132BFBF7CC4, 0xE99D662AF4243939,
+    0x27E6AD7891165C3F, 0x8535F040B9744FF1, 0x54B3F4FA5F40D873, 0x72B12C32127FED2B,
+    0xEE954D3C7B411F47, 0x9A85AC909A24EAA1, 0x70AC4CD9F04F21F5, 0xF9B89D3E99A075C2,
+    0x87B3E2B2B5C907B1, 0xA366E5B8C54F48B8, 0xAE4A9346CC3F7CF2, 0x1920C04D47267BBD,
+    0x87BF02C6B49E2AE9, 0x092237AC237F3859, 0xFF07F64EF8ED14D0, 0x8DE8DCA9F03CC54E,
+    0x9C1633264DB49C89, 0xB3F22C3D0B0B38ED, 0x390E5FB44D01144B, 0x5BFEA5B4712768E9,
+    0x1E1032911FA78984, 0x9A74ACB964E78CB3, 0x4F80F7A035DAFB04, 0x6304D09A0B3738C4,
+    0x2171E64683023A08, 0x5B9B63EB9CEFF80C, 0x506AACF489889342, 0x1881AFC9A3A701D6,
+    0x6503080440750644, 0xDFD395339CDBF4A7, 0xEF927DBCF00C20F2, 0x7B32F7D1E03680EC,
+    0xB9FD7620E7316243, 0x05A7E8A57DB91B77, 0xB5889C6E15630A75, 0x4A750A09CE9573F7,
+    0xCF464CEC899A2F8A, 0xF538639CE705B824, 0x3C79A0FF5580EF7F, 0xEDE6C87F8477609D,
+    0x799E81F05BC93F31, 0x86536B8CF3428A8C, 0x97D7374C60087B73, 0xA246637CFF328532,
+    0x043FCAE60CC0EBA0, 0x920E449535DD359E, 0x70EB093B15B290CC, 0x73A1921916591CBD,
+    0x56436C9FE1A1AA8D, 0xEFAC4B70633B8F81, 0xBB215798D45DF7AF, 0x45F20042F24F1768,
+    0x930F80F4E8EB7462, 0xFF6712FFCFD75EA1, 0xAE623FD67468AA70, 0xDD2C5BC84BC8D8FC,
+    0x7EED120D54CF2DD9, 0x22FE545401165F1C, 0xC91800E98FB99929, 0x808BD68E6AC10365,
+    0xDEC468145B7605F6, 0x1BEDE3A3AEF53302, 0x43539603D6C55602, 0xAA969B5C691CCB7A,
+    0xA87832D392EFEE56, 0x65942C7B3C7E11AE, 0xDED2D633CAD004F6, 0x21F08570F420E565,
+    0xB415938D7DA94E3C, 0x91B859E59ECB6350, 0x10CFF333E0ED804A, 0x28AED140BE0BB7DD,
+    0xC5CC1D89724FA456, 0x5648F680F11A2741, 0x2D255069F0B7DAB3, 0x9BC5A38EF729ABD4,
+    0xEF2F054308F6A2BC, 0xAF2042F5CC5C2858, 0x480412BAB7F5BE2A, 0xAEF3AF4A563DFE43,
+    0x19AFE59AE451497F, 0x52593803DFF1E840, 0xF4F076E65F2CE6F0, 0x11379625747D5AF3,
+    0xBCE5D2248682C115, 0x9DA4243DE836994F, 0x066F70B33FE09017, 0x4DC4DE189B671A1C,
+    0x51039AB7712457C3, 0xC07A3F80C31FB4B4, 0xB46EE9C5E64A6E7C, 0xB3819A42ABE61C87,
+    0x21A007933A522A20, 0x2DF16F761598AA4F, 0x763C4A1371B368FD, 0xF793C46702E086A0,
+    0xD7288E012AEB8D31, 0xDE336A2A4BC1C44B, 0x0BF692B38D079F23, 0x2C604A7A177326B3,
+    0x4850E73E03EB6064, 0xCFC447F1E53C8E1B, 0xB05CA3F564268D99, 0x9AE182C8BC9474E8,
+    0xA4FC4BD4FC5558CA, 0xE755178D58FC4E76, 0x69B97DB1A4C03DFE, 0xF9B5B7C4ACC67C96,
+    0xFC6A82D64B8655FB, 0x9C684CB6C4D24417, 0x8EC97D2917456ED0, 0x6703DF9D2924E97E,
+    0xC547F57E42A7444E, 0x78E37644E7CAD29E, 0xFE9A44E9362F05FA, 0x08BD35CC38336615,
+    0x9315E5EB3A129ACE, 0x94061B871E04DF75, 0xDF1D9F9D784BA010, 0x3BBA57B68871B59D,
+    0xD2B7ADEEDED1F73F, 0xF7A255D83BC373F8, 0xD7F4F2448C0CEB81, 0xD95BE88CD210FFA7,
+    0x336F52F8FF4728E7, 0xA74049DAC312AC71, 0xA2F61BB6E437FDB5, 0x4F2A5CB07F6A35B3,
+    0x87D380BDA5BF7859, 0x16B9F7E06C453A21, 0x7BA2484C8A0FD54E, 0xF3A678CAD9A2E38C,
+    0x39B0BF7DDE437BA2, 0xFCAF55C1BF8A4424, 0x18FCF680573FA594, 0x4C0563B89F495AC3,
+    0x40E087931A00930D, 0x8CFFA9412EB642C1, 0x68CA39053261169F, 0x7A1EE967D27579E2,
+    0x9D1D60E5076F5B6F, 0x3810E399B6F65BA2, 0x32095B6D4AB5F9B1, 0x35CAB62109DD038A,
+    0xA90B24499FCFAFB1, 0x77A225A07CC2C6BD, 0x513E5E634C70E331, 0x4361C0CA3F692F12,
+    0xD941ACA44B20A45B, 0x528F7C8602C5807B, 0x52AB92BEB9613989, 0x9D1DFA2EFC557F73,
+    0x722FF175F572C348, 0x1D1260A51107FE97, 0x7A249A57EC0C9BA2, 0x04208FE9E8F7F2D6,
+    0x5A110C6058B920A0, 0x0CD9A497658A5698, 0x56FD23C8F9715A4C, 0x284C847B9D887AAE,
+    0x04FEABFBBDB619CB, 0x742E1E651C60BA83, 0x9A9632E65904AD3C, 0x881B82A13B51B9E2,
+    0x506E6744CD974924, 0xB0183DB56FFC6A79, 0x0ED9B915C66ED37E, 0x5E11E86D5873D484,
+    0xF678647E3519AC6E, 0x1B85D488D0F20CC5, 0xDAB9FE6525D89021, 0x0D151D86ADB73615,
+    0xA865A54EDCC0F019, 0x93C42566AEF98FFB, 0x99E7AFEABE000731, 0x48CBFF086DDF285A,
+    0x7F9B6AF1EBF78BAF, 0x58627E1A149BBA21, 0x2CD16E2ABD791E33, 0xD363EFF5F0977996,
+    0x0CE2A38C344A6EED, 0x1A804AADB9CFA741, 0x907F30421D78C5DE, 0x501F65EDB3034D07,
+    0x37624AE5A48FA6E9, 0x957BAF61700CFF4E, 0x3A6C27934E31188A, 0xD49503536ABCA345,
+    0x088E049589C432E0, 0xF943AEE7FEBF21B8, 0x6C3B8E3E336139D3, 0x364F6FFA464EE52E,
+    0xD60F6DCEDC314222, 0x56963B0DCA418FC0, 0x16F50EDF91E513AF, 0xEF1955914B609F93,
+    0x565601C0364E3228, 0xECB53939887E8175, 0xBAC7A9A18531294B, 0xB344C470397BBA52,
+    0x65D34954DAF3CEBD, 0xB4B81B3FA97511E2, 0xB422061193D6F6A7, 0x071582401C38434D,
+    0x7A13F18BBEDC4FF5, 0xBC4097B116C524D2, 0x59B97885E2F2EA28, 0x99170A5DC3115544,
+    0x6F423357E7C6A9F9, 0x325928EE6E6F8794, 0xD0E4366228B03343, 0x565C31F7DE89EA27,
+    0x30F5611484119414, 0xD873DB391292ED4F, 0x7BD94E1D8E17DEBC, 0xC7D9F16864A76E94,
+    0x947AE053EE56E63C, 0xC8C93882F9475F5F, 0x3A9BF55BA91F81CA, 0xD9A11FBB3D9808E4,
+    0x0FD22063EDC29FCA, 0xB3F256D8ACA0B0B9, 0xB03031A8B4516E84, 0x35DD37D5871448AF,
+    0xE9F6082B05542E4E, 0xEBFAFA33D7254B59, 0x9255ABB50D532280, 0xB9AB4CE57F2D34F3,
+    0x693501D628297551, 0xC62C58F97DD949BF, 0xCD454F8F19C5126A, 0xBBE83F4ECC2BDECB,
+    0xDC842B7E2819E230, 0xBA89142E007503B8, 0xA3BC941D0A5061CB, 0xE9F6760E32CD8021,
+    0x09C7E552BC76492F, 0x852F54934DA55CC9, 0x8107FCCF064FCF56, 0x098954D51FFF6580,
+    0x23B70EDB1955C4BF, 0xC330DE426430F69D, 0x4715ED43E8A45C0A, 0xA8D7E4DAB780A08D,
+    0x0572B974F03CE0BB, 0xB57D2E985E1419C7, 0xE8D9ECBE2CF3D73F, 0x2FE4B17170E59750,
+    0x11317BA87905E790, 0x7FBF21EC8A1F45EC, 0x1725CABFCB045B00, 0x964E915CD5E2B207,
+    0x3E2B8BCBF016D66D, 0xBE7444E39328A0AC, 0xF85B2B4FBCDE44B7, 0x49353FEA39BA63B1,
+    0x1DD01AAFCD53486A, 0x1FCA8A92FD719F85, 0xFC7C95D827357AFA, 0x18A6A990C8B35EBD,
+    0xCCCB7005C6B9C28D, 0x3BDBB92C43B17F26, 0xAA70B5B4F89695A2, 0xE94C39A54A98307F,
+    0xB7A0B174CFF6F36E, 0xD4DBA84729AF48AD, 0x2E18BC1AD9704A68, 0x2DE0966DAF2F8B1C,
+    0xB9C11D5B1E43A07E, 0x64972D68DEE33360, 0x94628D38D0C20584, 0xDBC0D2B6AB90A559,
+    0xD2733C4335C6A72F, 0x7E75D99D94A70F4D, 0x6CED1983376FA72B, 0x97FCAACBF030BC24,
+    0x7B77497B32503B12, 0x8547EDDFB81CCB94, 0x79999CDFF70902CB, 0xCFFE1939438E9B24,
+    0x829626E3892D95D7, 0x92FAE24291F2B3F1, 0x63E22C147B9C3403, 0xC678B6D860284A1C,
+    0x5873888850659AE7, 0x0981DCD296A8736D, 0x9F65789A6509A440, 0x9FF38FED72E9052F,
+    0xE479EE5B9930578C, 0xE7F28ECD2D49EECD, 0x56C074A581EA17FE, 0x5544F7D774B14AEF,
+    0x7B3F0195FC6F290F, 0x12153635B2C0CF57, 0x7F5126DBBA5E0CA7, 0x7A76956C3EAFB413,
+    0x3D5774A11D31AB39, 0x8A1B083821F40CB4, 0x7B4A38E32537DF62, 0x950113646D1D6E03,
+    0x4DA8979A0041E8A9, 0x3BC36E078F7515D7, 0x5D0A12F27AD310D1, 0x7F9D1A2E1EBE1327,
+    0xDA3A361B1C5157B1, 0xDCDD7D20903D0C25, 0x36833336D068F707, 0xCE68341F79893389,
+    0xAB9090168DD05F34, 0x43954B3252DC25E5, 0xB438C2B67F98E5E9, 0x10DCD78E3851A492,
+    0xDBC27AB5447822BF, 0x9B3CDB65F82CA382, 0xB67B7896167B4C84, 0xBFCED1B0048EAC50,
+    0xA9119B60369FFEBD, 0x1FFF7AC80904BF45, 0xAC12FB171817EEE7, 0xAF08DA9177DDA93D,
+    0x1B0CAB936E65C744, 0xB559EB1D04E5E932, 0xC37B45B3F8D6F2BA, 0xC3A9DC228CAAC9E9,
+    0xF3B8B6675A6507FF, 0x9FC477DE4ED681DA, 0x67378D8ECCEF96CB, 0x6DD856D94D259236,
+    0xA319CE15B0B4DB31, 0x073973751F12DD5E, 0x8A8E849EB32781A5, 0xE1925C71285279F5,
+    0x74C04BF1790C0EFE, 0x4DDA48153C94938A, 0x9D266D6A1CC0542C, 0x7440FB816508C4FE,
+    0x13328503DF48229F, 0xD6BF7BAEE43CAC40, 0x4838D65F6EF6748F, 0x1E152328F3318DEA,
+    0x8F8419A348F296BF, 0x72C8834A5957B511, 0xD7A023A73260B45C, 0x94EBC8ABCFB56DAE,
+    0x9FC10D0F989993E0, 0xDE68A2355B93CAE6, 0xA44CFE79AE538BBE, 0x9D1D84FCCE371425,
+    0x51D2B1AB2DDFB636, 0x2FD7E4B9E72CD38C, 0x65CA5B96B7552210, 0xDD69A0D8AB3B546D,
+    0x604D51B25FBF70E2, 0x73AA8A564FB7AC9E, 0x1A8C1E992B941148, 0xAAC40A2703D9BEA0,
+    0x764DBEAE7FA4F3A6, 0x1E99B96E70A9BE8B, 0x2C5E9DEB57EF4743, 0x3A938FEE32D29981,
+    0x26E6DB8FFDF5ADFE, 0x469356C504EC9F9D, 0xC8763C5B08D1908C, 0x3F6C6AF859D80055,
+    0x7F7CC39420A3A545, 0x9BFB227EBDF4C5CE, 0x89039D79D6FC5C5C, 0x8FE88B57305E2AB6,
+    0xA09E8C8C35AB96DE, 0xFA7E393983325753, 0xD6B6D0ECC617C699, 0xDFEA21EA9E7557E3,
+    0xB67C1FA481680AF8, 0xCA1E3785A9E724E5, 0x1CFC8BED0D681639, 0xD18D8549D140CAEA,
+    0x4ED0FE7E9DC91335, 0xE4DBF0634473F5D2, 0x1761F93A44D5AEFE, 0x53898E4C3910DA55,
+    0x734DE8181F6EC39A, 0x2680B122BAA28D97, 0x298AF231C85BAFAB, 0x7983EED3740847D5,
+    0x66C1A2A1A60CD889, 0x9E17E49642A3E4C1, 0xEDB454E7BADC0805, 0x50B704CAB602C329,
+    0x4CC317FB9CDDD023, 0x66B4835D9EAFEA22, 0x219B97E26FFC81BD, 0x261E4E4C0A333A9D,
+    0x1FE2CCA76517DB90, 0xD7504DFA8816EDBB, 0xB9571FA04DC089C8, 0x1DDC0325259B27DE,
+    0xCF3F4688801EB9AA, 0xF4F5D05C10CAB243, 0x38B6525C21A42B0E, 0x36F60E2BA4FA6800,
+    0xEB3593803173E0CE, 0x9C4CD6257C5A3603, 0xAF0C317D32ADAA8A, 0x258E5A80C7204C4B,
+    0x8B889D624D44885D, 0xF4D14597E660F855, 0xD4347F66EC8941C3, 0xE699ED85B0DFB40D,
+    0x2472F6207C2D0484, 0xC2A1E7B5B459AEB5, 0xAB4F6451CC1D45EC, 0x63767572AE3D6174,
+    0xA59E0BD101731A28, 0x116D0016CB948F09, 0x2CF9C8CA052F6E9F, 0x0B090A7560A968E3,
+    0xABEEDDB2DDE06FF1, 0x58EFC10B06A2068D, 0xC6E57A78FBD986E0, 0x2EAB8CA63CE802D7,
+    0x14A195640116F336, 0x7C0828DD624EC390, 0xD74BBE77E6116AC7, 0x804456AF10F5FB53,
+    0xEBE9EA2ADF4321C7, 0x03219A39EE587A30, 0x49787FEF17AF9924, 0xA1E9300CD8520548,
+    0x5B45E522E4B1B4EF, 0xB49C3B3995091A36, 0xD4490AD526F14431, 0x12A8F216AF9418C2,
+    0x001F837CC7350524, 0x1877B51E57A764D5, 0xA2853B80F17F58EE, 0x993E1DE72D36D310,
+    0xB3598080CE64A656, 0x252F59CF0D9F04BB, 0xD23C8E176D113600, 0x1BDA0492E7E4586E,
+    0x21E0BD5026C619BF, 0x3B097ADAF088F94E, 0x8D14DEDB30BE846E, 0xF95CFFA23AF5F6F4,
+    0x3871700761B3F743, 0xCA672B91E9E4FA16, 0x64C8E531BFF53B55, 0x241260ED4AD1E87D,
+    0x106C09B972D2E822, 0x7FBA195410E5CA30, 0x7884D9BC6CB569D8, 0x0647DFEDCD894A29,
+    0x63573FF03E224774, 0x4FC8E9560F91B123, 0x1DB956E450275779, 0xB8D91274B9E9D4FB,
+    0xA2EBEE47E2FBFCE1, 0xD9F1F30CCD97FB09, 0xEFED53D75FD64E6B, 0x2E6D02C36017F67F,
+    0xA9AA4D20DB084E9B, 0xB64BE8D8B25396C1, 0x70CB6AF7C2D5BCF0, 0x98F076A4F7A2322E,
+    0xBF84470805E69B5F, 0x94C3251F06F90CF3, 0x3E003E616A6591E9, 0xB925A6CD0421AFF3,
+    0x61BDD1307C66E300, 0xBF8D5108E27E0D48, 0x240AB57A8B888B20, 0xFC87614BAF287E07,
+    0xEF02CDD06FFDB432, 0xA1082C0466DF6C0A, 0x8215E577001332C8, 0xD39BB9C3A48DB6CF,
+    0x2738259634305C14, 0x61CF4F94C97DF93D, 0x1B6BACA2AE4E125B, 0x758F450C88572E0B,
+    0x959F587D507A8359, 0xB063E962E045F54D, 0x60E8ED72C0DFF5D1, 0x7B64978555326F9F,
+    0xFD080D236DA814BA, 0x8C90FD9B083F4558, 0x106F72FE81E2C590, 0x7976033A39F7D952,
+    0xA4EC0132764CA04B, 0x733EA705FAE4FA77, 0xB4D8F77BC3E56167, 0x9E21F4F903B33FD9,
+    0x9D765E419FB69F6D, 0xD30C088BA61EA5EF, 0x5D94337FBFAF7F5B, 0x1A4E4822EB4D7A59,
+    0x6FFE73E81B637FB3, 0xDDF957BC36D8B9CA, 0x64D0E29EEA8838B3, 0x08DD9BDFD96B9F63,
+    0x087E79E5A57D1D13, 0xE328E230E3E2B3FB, 0x1C2559E30F0946BE, 0x720BF5F26F4D2EAA,
+    0xB0774D261CC609DB, 0x443F64EC5A371195, 0x4112CF68649A260E, 0xD813F2FAB7F5C5CA,
+    0x660D3257380841EE, 0x59AC2C7873F910A3, 0xE846963877671A17, 0x93B633ABFA3469F8,
+    0xC0C0F5A60EF4CDCF, 0xCAF21ECD4377B28C, 0x57277707199B8175, 0x506C11B9D90E8B1D,
+    0xD83CC2687A19255F, 0x4A29C6465A314CD1, 0xED2DF21216235097, 0xB5635C95FF7296E2,
+    0x22AF003AB672E811, 0x52E762596BF68235, 0x9AEBA33AC6ECC6B0, 0x944F6DE09134DFB6,
+    0x6C47BEC883A7DE39, 0x6AD047C430A12104, 0xA5B1CFDBA0AB4067, 0x7C45D833AFF07862,
+    0x5092EF950A16DA0B, 0x9338E69C052B8E7B, 0x455A4B4CFE30E3F5, 0x6B02E63195AD0CF8,
+    0x6B17B224BAD6BF27, 0xD1E0CCD25BB9C169, 0xDE0C89A556B9AE70, 0x50065E535A213CF6,
+    0x9C1169FA2777B874, 0x78EDEFD694AF1EED, 0x6DC93D9526A50E68, 0xEE97F453F06791ED,
+    0x32AB0EDB696703D3, 0x3A6853C7E70757A7, 0x31865CED6120F37D, 0x67FEF95D92607890,
+    0x1F2B1D1F15F6DC9C, 0xB69E38A8965C6B65, 0xAA9119FF184CCCF4, 0xF43C732873F24C13,
+    0xFB4A3D794A9A80D2, 0x3550C2321FD6109C, 0x371F77E76BB8417E, 0x6BFA9AAE5EC05779,
+    0xCD04F3FF001A4778, 0xE3273522064480CA, 0x9F91508BFFCFC14A, 0x049A7F41061A9E60,
+    0xFCB6BE43A9F2FE9B, 0x08DE8A1C7797DA9B, 0x8F9887E6078735A1, 0xB5B4071DBFC73A66,
+    0x230E343DFBA08D33, 0x43ED7F5A0FAE657D, 0x3A88A0FBBCB05C63, 0x21874B8B4D2DBC4F,
+    0x1BDEA12E35F6A8C9, 0x53C065C6C8E63528, 0xE34A1D250E7A8D6B, 0xD6B04D3B7651DD7E,
+    0x5E90277E7CB39E2D, 0x2C046F22062DC67D, 0xB10BB459132D0A26, 0x3FA9DDFB67E2F199,
+    0x0E09B88E1914F7AF, 0x10E8B35AF3EEAB37, 0x9EEDECA8E272B933, 0xD4C718BC4AE8AE5F,
+    0x81536D601170FC20, 0x91B534F885818A06, 0xEC8177F83F900978, 0x190E714FADA5156E,
+    0xB592BF39B0364963, 0x89C350C893AE7DC1, 0xAC042E70F8B383F2, 0xB49B52E587A1EE60,
+    0xFB152FE3FF26DA89, 0x3E666E6F69AE2C15, 0x3B544EBE544C19F9, 0xE805A1E290CF2456,
+    0x24B33C9D7ED25117, 0xE74733427B72F0C1, 0x0A804D18B7097475, 0x57E3306D881EDB4F,
+    0x4AE7D6A36EB5DBCB, 0x2D8D5432157064C8, 0xD1E649DE1E7F268B, 0x8A328A1CEDFE552C,
+    0x07A3AEC79624C7DA, 0x84547DDC3E203C94, 0x990A98FD5071D263, 0x1A4FF12616EEFC89,
+    0xF6F7FD1431714200, 0x30C05B1BA332F41C, 0x8D2636B81555A786, 0x46C9FEB55D120902,
+    0xCCEC0A73B49C9921, 0x4E9D2827355FC492, 0x19EBB029435DCB0F, 0x4659D2B743848A2C,
+    0x963EF2C96B33BE31, 0x74F85198B05A2E7D, 0x5A0F544DD2B1FB18, 0x03727073C2E134B1,
+    0xC7F6AA2DE59AEA61, 0x352787BAA0D7C22F, 0x9853EAB63B5E0B35, 0xABBDCDD7ED5C0860,
+    0xCF05DAF5AC8D77B0, 0x49CAD48CEBF4A71E, 0x7A4C10EC2158C4A6, 0xD9E92AA246BF719E,
+    0x13AE978D09FE5557, 0x730499AF921549FF, 0x4E4B705B92903BA4, 0xFF577222C14F0A3A,
+    0x55B6344CF97AAFAE, 0xB862225B055B6960, 0xCAC09AFBDDD2CDB4, 0xDAF8E9829FE96B5F,
+    0xB5FDFC5D3132C498, 0x310CB380DB6F7503, 0xE87FBB46217A360E, 0x2102AE466EBB1148,
+    0xF8549E1A3AA5E00D, 0x07A69AFDCC42261A, 0xC4C118BFE78FEAAE, 0xF9F4892ED96BD438,
+    0x1AF3DBE25D8F45DA, 0xF5B4B0B0D2DEEEB4, 0x962ACEEFA82E1C84, 0x046E3ECAAF453CE9,
+    0xF05D129681949A4C, 0x964781CE734B3C84, 0x9C2ED44081CE5FBD, 0x522E23F3925E319E,
+    0x177E00F9FC32F791, 0x2BC60A63A6F3B3F2, 0x222BBFAE61725606, 0x486289DDCC3D6780,
+    0x7DC7785B8EFDFC80, 0x8AF38731C02BA980, 0x1FAB64EA29A2DDF7, 0xE4D9429322CD065A,
+    0x9DA058C67844F20C, 0x24C0E332B70019B0, 0x233003B5A6CFE6AD, 0xD586BD01C5C217F6,
+    0x5E5637885F29BC2B, 0x7EBA726D8C94094B, 0x0A56A5F0BFE39272, 0xD79476A84EE20D06,
+    0x9E4C1269BAA4BF37, 0x17EFEE45B0DEE640, 0x1D95B0A5FCF90BC6, 0x93CBE0B699C2585D,
+    0x65FA4F227A2B6D79, 0xD5F9E858292504D5, 0xC2B5A03F71471A6F, 0x59300222B4561E00,
+    0xCE2F8642CA0712DC, 0x7CA9723FBB2E8988, 0x2785338347F2BA08, 0xC61BB3A141E50E8C,
+    0x150F361DAB9DEC26, 0x9F6A419D382595F4, 0x64A53DC924FE7AC9, 0x142DE49FFF7A7C3D,
+    0x0C335248857FA9E7, 0x0A9C32D5EAE45305, 0xE6C42178C4BBB92E, 0x71F1CE2490D20B07,
+    0xF1BCC3D275AFE51A, 0xE728E8C83C334074, 0x96FBF83A12884624, 0x81A1549FD6573DA5,
+    0x5FA7867CAF35E149, 0x56986E2EF3ED091B, 0x917F1DD5F8886C61, 0xD20D8C88C8FFE65F,
+    0x31D71DCE64B2C310, 0xF165B587DF898190, 0xA57E6339DD2CF3A0, 0x1EF6E6DBB1961EC9,
+    0x70CC73D90BC26E24, 0xE21A6B35DF0C3AD7, 0x003A93D8B2806962, 0x1C99DED33CB890A1,
+    0xCF3145DE0ADD4289, 0xD0E4427A5514FB72, 0x77C621CC9FB3A483, 0x67A34DAC4356550B,
+    0xF8D626AAAF278509
+]
+
+def getPolyglotKey(state):
+    """The Polyglot key of the position"""
+    key = 0
+    for row in range(8):
+        for column in range(8):
+            piece = state.board[row][column]
+            if piece != "--":
+                key ^= POLYGLOT_RANDOM[64 * POLYGLOT_PIECES[piece] + 8 * (7 - row) + column]
+    for i, (char, right) in enumerate(CASTLING_CHARS):
+        if state.currentCastling & right:
+            key ^= POLYGLOT_RANDOM[768 + i]
+    if state.enpassant: # Polyglot only counts the en-passant square when a pawn is next to the pawn that moved
+        row, column = state.enpassant
+        pawnRow, pawn = (row + 1, "wp") if state.whiteMove else (row - 1, "bp")
+        if any(0 <= side < 8 and state.board[pawnRow][side] == pawn for side in (column - 1, column + 1)):
+            key ^= POLYGLOT_RANDOM[772 + column]
+    if state.whiteMove:
+        key ^= POLYGLOT_RANDOM[780]
+    return key
+
+def encodeBookMove(move):
+    """The Polyglot encoding of a move. Castling is written as the king capturing its own rook."""
+    endCol = (7 if move.endCol == 6 else 0) if move.isCastle else move.endCol
+    return (endCol | (7 - move.endRow) << 3 | move.startCol << 6 | (7 - move.startRow) << 9
+            | POLYGLOT_PROMOTIONS[move.promotionPiece] << 12)
+
+class OpeningBook():
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b"" # An empty file can not be mapped
+        self.count = size // BOOK_ENTRY.size
+    
+    def getEntries(self, key):
+        """Return (move, weight) for each entry of the position with the given key"""
+        low, high = 0, self.count
+        while low < high: # Find the first entry with this key
+            middle = (low + high) // 2
+            if BOOK_ENTRY.unpack_from(self.data, middle * BOOK_ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        for index in range(low, self.count):
+            entryKey, move, weight, learn = BOOK_ENTRY.unpack_from(self.data, index * BOOK_ENTRY.size)
+            if entryKey != key:
+                break
+            entries.append((move, weight))
+        return entries
+    
+    def findMove(self, state, valid):
+        """Pick one of the book moves for the position at random, in proportion to the weights.
+        Returns None if the position is not in the book.
+        """
+        moves = {encodeBookMove(move): move for move in valid}
+        choices = [(moves[move], weight) for move, weight in self.getEntries(getPolyglotKey(state)) if move in moves and weight]
+        if not choices:
+            return None
+        return random.choices([move for move, weight in choices], [weight for move, weight in choices])[0]
+    
+    def close(self):
+        if self.count:
+            self.data.close()
+        self.file.close()
+
+openingBook = None # Opened by findBookMove() the first time it is needed
+
+def findBookMove(state, valid):
+    """Return a move from the opening book (BOOK_FILE), or None if there is no book or the position is not in it"""
+    global openingBook
+    if BOOK_FILE is None:
+        return None
+    if openingBook is None or openingBook.path != BOOK_FILE:
+        if not os.path.isfile(BOOK_FILE):
+            return None
+        if openingBook is not None:
+            openingBook.close()
+        openingBook = OpeningBook(BOOK_FILE)
+    return openingBook.findMove(state, valid)
+
+def getBookEntries(tags, moves, result, plies=BOOK_PLIES):
+    """Return (key, move, weight) for the first plies moves of a game, for buildBook().
+    A move is worth 2 if the side that played it won, 1 if the game was drawn (or has no result) and 0 if it lost.
+    """
+    if not moves: # Including games whose FEN tag could not be read
+        return []
+    state = GameState(tags.get("FEN"))
+    entries = []
+    for move in moves[:plies]:
+        points = {"1-0": 2, "0-1": 0}.get(result, 1)
+        entries.append((getPolyglotKey(state), encodeBookMove(move), points if state.whiteMove or points == 1 else 2 - points))
+        state.makeMove(move)
+    return entries
+
+def buildBook(pgnPath, bookPath, plies=BOOK_PLIES, workers=1):
+    """Make a Polyglot book from the first plies moves of every game in a PGN file"""
+    weights = {}
+    games = 0
+    start = perf_counter()
+    with open(pgnPath, encoding="utf-8", errors="replace") as file:
+        if workers > 1:
+            allEntries = mapPGN(file, partial(getBookEntries, plies=plies), workers)
+        else:
+            allEntries = (getBookEntries(*game, plies=plies) for game in readPGN(file))
+        for entries in allEntries:
+            games += 1
+            for key, move, weight in entries:
+                weights[key, move] = weights.get((key, move), 0) + weight
+    
+    # Weights are 16-bit, so the moves of very common positions are scaled down together
+    largest = {}
+    for (key, move), weight in weights.items():
+        largest[key] = max(largest.get(key, 0), weight)
+    count = 0
+    with open(bookPath, "wb") as book:
+        for (key, move), weight in sorted(weights.items()):
+            if largest[key] > 0xFFFF:
+                weight = max(weight * 0xFFFF // largest[key], 1 if weight else 0)
+            if weight: # Moves that only ever lost are left out
+                book.write(BOOK_ENTRY.pack(key, move, weight, 0))
+                count += 1
+    print(f"{bookPath}: {count} moves in {len(largest)} positions from {games} games ({perf_counter() - start:.1f}s)")
+    return count
+
+"""
+Bitbases:
+Tables that say whether king and queen, king and rook, or king and pawn against a lone king is a win or a draw,
+for every position and either side to move. They are made once with buildBitbases() (see --build-bitbases) and saved
+as packed bit arrays, one bit per position. The search maps the files in the first time it reaches one of these
+endings, after which each lookup is a single bit test.
+
+The tables are stored with white as the side that has the piece; positions where black has it are mirrored.
+A position's bit is at ((strong king * 64 + weak king) * 64 + piece), using GameState square numbers, plus
+BITBASE_POSITIONS when the weak side is to move. A set bit means the side with the piece wins.
+"""
+BITBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bitbases")
+BITBASE_FILES = {"Q": "KQK.bin", "R": "KRK.bin", "p": "KPK.bin"}
+BITBASE_POSITIONS = 64 * 64 * 64 # For each side to move
+KNOWN_WIN = 20000 # Score of a won bitbase position, below CHECKMATE so that a checkmate the search can see comes first
+bitbases = {} # Piece -> the mapped bitbase (or None if it has not been built), filled in by getBitbase()
+
+def generateBitbase(kind, promotions=()):
+    """Work out which positions of king and kind (Q, R or p) against king are won, and return them as a packed
+    bit array. promotions are the finished bitbases that a pawn can promote into (the queen and rook ones).
+    
+    This is a retrograde analysis: it starts from the checkmates (and for a pawn, from the winning promotions), and
+    works backwards through the moves that lead to them. A position with the strong side to move is won as soon as
+    one of its moves leads to a lost position, and a position with the weak side to move is lost once every one of
+    its moves leads to a won position. Every other position is a draw.
+    """
+    won = bytearray(BITBASE_POSITIONS) # Strong side to move, and wins
+    lost = bytearray(BITBASE_POSITIONS) # Weak side to move, and loses
+    legal = bytearray(BITBASE_POSITIONS) # Strong side to move, and the weak king is not in check
+    remaining = bytearray(BITBASE_POSITIONS) # Weak side to move: moves not yet known to lose
+    directions = ROOK_DIRECTIONS if kind == "R" else range(8)
+    queue = [] # Won positions, and lost positions + BITBASE_POSITIONS, whose earlier positions have to be checked
+    
+    for wk in range(64):
+        for bk in range(64):
+            if bk == wk or KING_ATTACKS[wk] >> bk & 1:
+                continue
+            for p in range(8, 56) if kind == "p" else range(64):
+                if p == wk or p == bk:
+                    continue
+                index = (wk * 64 + bk) * 64 + p
+                # The weak king does not block the attacks, since it can not step back along a line of attack
+                pieceAttacks = PAWN_ATTACKS["w"][p] if kind == "p" else slidingAttacks(p, 1 << wk | 1 << p, directions)
+                attacked = KING_ATTACKS[wk] | pieceAttacks
+                moves = (KING_ATTACKS[bk] & ~attacked).bit_count() # Taking an undefended piece counts, and is a draw
+                remaining[index] = moves
+                if not moves and attacked >> bk & 1: # Checkmate
+                    lost[index] = 1
+                    queue.append(index + BITBASE_POSITIONS)
+                if not attacked >> bk & 1:
+                    legal[index] = 1
+                    promotion = index - 8
+                    if kind == "p" and p < 16 and p - 8 not in (wk, bk) and any(
+                            table[(promotion + BITBASE_POSITIONS) >> 3] >> (promotion & 7) & 1 for table in promotions):
+                        won[index] = 1
+                        queue.append(index)
+    
+    while queue:
+        entry = queue.pop()
+        index = entry % BITBASE_POSITIONS
+        wk, bk, p = index >> 12, index >> 6 & 63, index & 63
+        occupied = 1 << wk | 1 << bk | 1 << p
+        if entry >= BITBASE_POSITIONS: # Lost for the weak side, so every strong move into it wins
+            earlier = [(square * 64 + bk) * 64 + p for square in squaresOf(KING_ATTACKS[wk] & ~occupied & ~KING_ATTACKS[bk])]
+            if kind == "p":
+                if p < 48 and not occupied >> (p + 8) & 1:
+                    earlier.append(index + 8)
+                    if p >> 3 == 4 and not occupied >> (p + 16) & 1: # Two squares from the starting row
+                        earlier.append(index + 16)
+            else:
+                earlier += [(wk * 64 + bk) * 64 + square for square in squaresOf(slidingAttacks(p, occupied, directions) & ~occupied)]
+            for before in earlier:
+                if legal[before] and not won[before]:
+                    won[before] = 1
+                    queue.append(before)
+        else: # Won for the strong side, so a weak move into it is one fewer way out
+            for square in squaresOf(KING_ATTACKS[bk] & ~occupied & ~KING_ATTACKS[wk]):
+                before = (wk * 64 + square) * 64 + p
+                if not lost[before]:
+                    remaining[before] -= 1
+                    if not remaining[before]:
+                        lost[before] = 1
+                        queue.append(before + BITBASE_POSITIONS)
+    
+    bits = bytearray(BITBASE_POSITIONS // 4)
+    for index in range(BITBASE_POSITIONS):
+        if won[index]:
+            bits[index >> 3] |= 1 << (index & 7)
+        if lost[index]:
+            bits[(index + BITBASE_POSITIONS) >> 3] |= 1 << (index & 7)
+    return bits
+
+def squaresOf(bitboard):
+    """The squares of the set bits of a bitboard"""
+    squares = []
+    while bitboard:
+        square = (bitboard & -bitboard).bit_length() - 1
+        squares.append(square)
+        bitboard &= bitboard - 1
+    return squares
+
+def buildBitbases(directory=BITBASE_DIR):
+    """Generate the KQK, KRK and KPK bitbases and save them in directory"""
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    for kind in ("Q", "R", "p"): # The pawn bitbase needs the other two for promotions
+        start = perf_counter()
+        tables[kind] = generateBitbase(kind, (tables["Q"], tables["R"]) if kind == "p" else ())
+        with open(os.path.join(directory, BITBASE_FILES[kind]), "wb") as file:
+            file.write(tables[kind])
+        wins = sum(byte.bit_count() for byte in tables[kind])
+        print(f"{BITBASE_FILES[kind]}: {wins} won positions, {len(tables[kind])} bytes ({perf_counter() - start:.1f}s)")
+    bitbases.clear() # Map the new files next time
+
+def getBitbase(kind):
+    """Return the bitbase for kind (Q, R or p), mapping its file in the first time, or None if it has not been built"""
+    if kind not in bitbases:
+        path = os.path.join(BITBASE_DIR, BITBASE_FILES[kind])
+        if os.path.isfile(path):
+            with open(path, "rb") as file:
+                bitbases[kind] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            bitbases[kind] = None
+    return bitbases[kind]
+
+def probeBitbases(state):
+    """Return the score (positive is good for white) of a KQK, KRK or KPK position from the bitbases,
+    or None if the position is not one of those or the bitbase has not been built.
+    A won position scores KNOWN_WIN, plus a bonus for progress: pushing the pawn, or driving the lone king to the
+    edge with the other king close by, so that the search can find its way to the checkmate.
+    """
+    for piece in ("wQ", "wR", "wp", "bQ", "bR", "bp"):
+        if state.bitboards[piece]:
+            break
+    else:
+        return None
+    strong, kind = piece
+    table = getBitbase(kind)
+    if table is None:
+        return None
+    flip = 0 if strong == "w" else 56 # Mirror the ranks, so that the side with the piece is white
+    strongKing = (state.bitboards[strong + "K"].bit_length() - 1) ^ flip
+    weakKing = (state.bitboards[("b" if strong == "w" else "w") + "K"].bit_length() - 1) ^ flip
+    square = (state.bitboards[piece].bit_length() - 1) ^ flip
+    index = (strongKing * 64 + weakKing) * 64 + square + (0 if state.whiteMove == (strong == "w") else BITBASE_POSITIONS)
+    if not table[index >> 3] >> (index & 7) & 1:
+        return 0
+    if kind == "p":
+        progress = (6 - (square >> 3)) * 20
+    else:
+        row, column = SQUARES[weakKing]
+        edge = max(3 - row, row - 4) + max(3 - column, column - 4)
+        distance = abs(row - (strongKing >> 3)) + abs(column - (strongKing & 7))
+        progress = 10 * edge + 4 * (14 - distance)
+    score = KNOWN_WIN + MG_VALUE[kind] + progress
+    return score if strong == "w" else -score
+
+"""
+
+Below this class is the main code. It is responsible for handling user input,
+as well as displaying the current GameState object.
+
+"""
+
+BWIDTH, BHEIGHT = 512, 512
+LOGWIDTH, LOGHEIGHT = 250, BHEIGHT
+DIMENSION = 8 # Dimension of the chess board
+squareSize = BHEIGHT // DIMENSION
+FPS = 60 # Frame rate while a move is being animated. Otherwise the window is only drawn when something changes.
+ANIMATION_SPEED = 12 # Squares per second that an animated piece moves
+AI_WAIT_TIMEOUT = 250 # Milliseconds between checks on the AI, in case the event it sends when it is done goes missing
+IMAGES = {} # The piece images at the current squareSize, filled by loadImages()
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__)) # The images and sounds folders are next to this file
+
+class Assets():
+    """
+    Loads the piece images and the sound effects once per process, however many games are played.
+    The 12 piece images are packed side by side into one atlas surface, converted to the display format, and each
+    piece is a subsurface of it. Scaled copies of the atlas are kept for each square size they were asked for.
+    Sounds are only decoded the first time they are played, so starting up does not wait for them.
+    Files are found by name, in folders next to this file, whatever the working directory is.
+    """
+    PIECES = ["wp","wR","wN","wB","wQ","wK","bp","bR","bN","bB","bQ","bK"]
+    SOUND_FILES = {"start": "game-start.mp3", "move": "move-self.mp3", "capture": "capture.mp3",
+                   "castle": "castle.mp3", "check": "move-check.mp3", "end": "game-end.mp3"}
+    
+    def __init__(self, directory=ASSET_DIR):
+        self.directory = directory
+        self.atlas = None # All the piece images at their original size
+        self.cellSize = None # (width, height) of each image in the atlas
+        self.scaled = {} # square size -> {piece: image}
+        self.sounds = {} # name -> Sound (or None if the mixer could not load it)
+    
+    def loadAtlas(self):
+        """Load the piece images into self.atlas, in the order of PIECES. The display mode has to be set first."""
+        images = [pygame.image.load(os.path.join(self.directory, "images", piece + ".png")) for piece in self.PIECES]
+        width = max(image.get_width() for image in images)
+        height = max(image.get_height() for image in images)
+        atlas = pygame.Surface((width * len(images), height), pygame.SRCALPHA)
+        for i, image in enumerate(images):
+            atlas.blit(image, (i * width, 0))
+        self.atlas = atlas.convert_alpha() # Converted once, rather than on every blit
+        self.cellSize = (width, height)
+    
+    def getPieces(self, size):
+        """Return {piece: image} with the images scaled to size x size pixels, as subsurfaces of one scaled atlas"""
+        if size not in self.scaled:
+            if self.atlas is None:
+                self.loadAtlas()
+            width, height = self.cellSize
+            atlas = pygame.Surface((size * len(self.PIECES), size), pygame.SRCALPHA).convert_alpha()
+            for i in range(len(self.PIECES)):
+                # Each image is scaled on its own, so that no pixels of its neighbours are blended into its edges
+                atlas.blit(pygame.transform.scale(self.atlas.subsurface((i * width, 0, width, height)), (size, size)), (i * size, 0))
+            self.scaled[size] = {piece: atlas.subsurface((i * size, 0, size, size)) for i, piece in enumerate(self.PIECES)}
+        return self.scaled[size]
+    
+    def playSound(self, name):
+        """Play one of the SOUND_FILES, decoding it the first time it is played"""
+        if name not in self.sounds:
+            try:
+                self.sounds[name] = pySound(os.path.join(self.directory, "sounds", self.SOUND_FILES[name]))
+            except pygame.error: # The mixer is not available (e.g. there is no audio device), so play without sound
+                self.sounds[name] = None
+        if self.sounds[name] is not None:
+            self.sounds[name].play()
+
+ASSETS = Assets()
+
+def loadImages():
+    """Fill IMAGES with the piece images for the current squareSize. ASSETS only loads them the first time."""
+    IMAGES.update(ASSETS.getPieces(squareSize))
+
+# Main function - handles user input and updating graphics
+
+def main():
+    
+    pygame.init() # Initialize pygame
+    screen = pygame.display.set_mode((BWIDTH + LOGWIDTH, BHEIGHT)) # Set the BHEIGHT and BWIDTH of the pygame window
+    pygame.event.set_blocked(pygame.MOUSEMOTION) # Not used, so moving the mouse does not wake the main loop
+    screen.fill(pygame.Color("white"))
+    logFont = pygame.font.SysFont("Consolas", 14, False, False)
+    
+    state = GameState()
+    valid = state.getVMoves()
+    
+    anim = False # Flag this variable when you want to animate a move
+    moveMade = False # Flag this variable when a valid move is made
+
+    global gameOver
+    gameOver = False # Flag this variable when the game is over
+    loadImages() # The images are only loaded the first time, so playing again does not load them again
+    view = BoardView(screen, logFont)
+    
+    global MANUAL_QUIT, restartGame
+    MANUAL_QUIT = False # Flag this variable when the user clicks the 'X' button to close the program.
+    restartGame = False # Flag this variable when the user wants to play again.
+    
+    selected = () # Initially, no square is selected. This should keep track of the user's last clicked square as a tuple (row, column)
+    clicks = [] # This should keep track of the player's current clicks as two tuples in a list [(start_row, start_column), (end_row, end_column)]
+
+    aiSearch = None # The BackgroundSearch looking for the AI's next move, while it is thinking
+
+    ASSETS.playSound("start")
+
+    view.draw(state, valid, selected)
+    view.update()
+    
+    global done
+    done = False
+    while not done:
+        humanTurn = (state.whiteMove and whitePlayer) or (not state.whiteMove and blackPlayer)
+        # Sleep until there is input, the AI has found its move or the next animation frame is due
+        if aiSearch is not None and aiSearch.ready() and view.animation is None:
+            events = [] # The AI's move was held back by an animation, and the event it sent has already been handled
+        elif view.animation is not None:
+            events = [pygame.event.wait(1000 // FPS)]
+        elif aiSearch is not None:
+            events = [pygame.event.wait(AI_WAIT_TIMEOUT)]
+        else:
+            events = [pygame.event.wait()]
+        events += pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                done = True
+                if aiSearch is not None:
+                    aiSearch.cancel()
+                    aiSearch = None
+            elif event.type == pygame.WINDOWEXPOSED: # The window was covered or minimised, and has to be drawn again
+                view.invalidate()
+            elif event.type == pygame.MOUSEWHEEL: # Scroll the move log
+                if pygame.mouse.get_pos()[0] >= BWIDTH:
+                    view.moveLog.scroll(-3 * event.y)
+            elif event.type == pygame.KEYDOWN: # Key handler
+##                if event.key == pygame.K_z: # Undo move
+##                    state.undoMove()
+##                    moveMade = True
+##                    anim = False
+                if event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN): # Scroll the move log by a page
+                    page = view.moveLog.visibleLines
+                    view.moveLog.scroll(-page if event.key == pygame.K_PAGEUP else page)
+                if event.key == pygame.K_r: # Reset game
+                    if aiSearch is not None:
+                        aiSearch.cancel()
+                        aiSearch = None
+                    view.stopAnimation()
+                    state = GameState()
+                    valid = state.getVMoves()
+                    selected = ()
+                    clicks = []
+                    moveMade = False
+                    anim = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button <= 3: # Mouse handler (the wheel sends buttons 4 and up)
+                if not gameOver and humanTurn:
+                    mousepos = pygame.mouse.get_pos() # Get the location of the mouse in the window, stored as (x, y)
+                    column = mousepos[0] // squareSize
+                    row = mousepos[1] // squareSize
+                    if (row, column) == selected or column >= 8: # Check if the user has clicked the same square twice or user clicked the move log
+                        selected = () # Clear the last clicked square stored in the tuple.
+                        clicks = [] # Clear the player's current clicks
+                    else:
+                        selected = (row, column)
+                        clicks.append(selected) # Append the 'clicks' list for both the 1st and 2nd clicks
+                    if len(clicks) == 2: # Check if there are two coordinates in the 'clicks' list
+                        move = Move(clicks[0], clicks[1], state.board)
+                        for i in range(len(valid)):
+                            if move == valid[i]:
+                                state.makeMove(valid[i])
+                                if move.isCastle or move.isPromotion:
+                                    ASSETS.playSound("castle")
+                                elif move.isCapture or move.isEnPassant:
+                                    ASSETS.playSound("capture")
+                                else:
+                                    ASSETS.playSound("move")
+                                anim = True
+                                moveMade = True
+                                selected = () # Reset user clicks
+                                clicks = []
+                        if not moveMade:
+                            clicks = [selected] 
+        
+        # AI move finder
+        if not (done or gameOver or humanTurn):
+            if aiSearch is None:
+                # Wakes the main loop up when the move has been found (pygame.event.post() can be called from any thread)
+                aiSearch = BackgroundSearch(state, onDone=lambda: pygame.event.post(pygame.event.Event(pygame.USEREVENT)))
+            elif aiSearch.ready() and view.animation is None: # Let the last move finish before playing the next
+                # The move was found on a copy of the board, so play the matching move from this one
+                AIMove = next((move for move in valid if aiSearch.move is not None and move.ID == aiSearch.move.ID), None)
+                if AIMove is None:
+                    AIMove = findRandomMove(valid)
+                aiSearch = None
+                state.makeMove(AIMove)
+                moveMade = True
+                anim = True
+        
+        if moveMade:
+            if anim:
+                view.startAnimation(state.log[-1])
+            valid = state.getVMoves()
+            moveMade = False
+            anim = False
+            
+        view.draw(state, valid, selected)
+        
+        global RESULT
+        if gameOver:
+            pass
+        elif state.checkmate:
+            gameOver = True
+            ASSETS.playSound("end")
+            if state.whiteMove:
+                RESULT = "Black won by checkmate!"
+            else:
+                RESULT = "White won by checkmate!"
+        elif state.stalemate:
+            gameOver = True
+            ASSETS.playSound("end")
+            RESULT = "Draw by stalemate..."
+        elif state.turnsSinceCapture >= 100: # 50 moves by each player
+            gameOver = True
+            ASSETS.playSound("end")
+            RESULT = "Draw by 50-move rule..."
+        if gameOver and view.animation is None: # Let the last move finish animating first
+            done = True
+        
+        view.update()
+    if not gameOver:
+        MANUAL_QUIT = True
+        pygame.quit()
+    else:
+        pass
+
+def getHighlights(state, moves, squareSelected):
+    """Move highlighting: the piece selected is highlighted in blue, and the squares it can move to in yellow.
+
+    Args:
+        state: the current state of the board
+        moves: list of valid moves
+        squareSelected: the square selected
+
+    Returns:
+        {(row, column): colour name} of the highlighted squares
+    """
+    highlights = {}
+    if squareSelected != ():
+        row, column = squareSelected
+        if state.board[row][column][0] == ("w" if state.whiteMove else "b"):
+            highlights[squareSelected] = "blue"
+            for move in moves:
+                if move.startRow == row and move.startCol == column:
+                    highlights[(move.endRow, move.endCol)] = "yellow"
+    return highlights
+
+class BoardView():
+    """
+    Draws the current GameState into the window, redrawing only what changed since the last frame.
+    The checkered squares are drawn once into a cached background surface, and the view remembers what each square
+    shows (its piece and highlight), so a frame where nothing has changed draws nothing.
+    The parts of the window that were drawn are collected as rectangles and pushed to the display by update().
+    
+    Squares are drawn into self.layer first, which is the board without the piece being animated. A move animation
+    is a tween over time rather than a loop of its own: each draw() puts the moving piece where it should be by now,
+    after restoring what was under it from the layer, so the main loop keeps handling input while it plays.
+    """
+    def __init__(self, screen, logFont):
+        self.screen = screen
+        self.moveLog = MoveLogView(logFont)
+        self.background = pygame.Surface((BWIDTH, BHEIGHT))
+        drawBoard(self.background)
+        self.highlights = {}
+        for colour in ("blue", "yellow"):
+            square = pygame.Surface((squareSize, squareSize))
+            square.set_alpha(100) # Transparency (transparent : 0 -> 255 : opaque)
+            square.fill(pygame.Color(colour))
+            self.highlights[colour] = square
+        self.layer = self.background.copy()
+        self.animation = None # (move, start time, duration) of the move being animated, times in milliseconds
+        self.pieceRect = None # Where the animated piece was last drawn
+        self.dirty = [] # Rectangles of the window drawn since the last update()
+        self.invalidate()
+    
+    def invalidate(self):
+        """Forget what is on the screen, so that the next draw() redraws everything (e.g. after the window was covered)"""
+        self.squares = [[None] * DIMENSION for _ in range(DIMENSION)] # (piece, highlight) last drawn on each square
+        self.moveLog.changed = True
+    
+    def draw(self, state, validMoves, selectedSquare):
+        """Redraw the squares whose piece or highlight has changed, the move log if it has changed or scrolled,
+        and the next frame of the animation if there is one
+        """
+        if self.animation is not None and pygame.time.get_ticks() >= self.animation[1] + self.animation[2]:
+            self.stopAnimation()
+        hidden = {} # Squares that show what was on them before the animated move, until the piece lands
+        if self.animation is not None:
+            move = self.animation[0]
+            if move.isEnPassant:
+                hidden[(move.endRow, move.endCol)] = "--"
+                hidden[(move.startRow, move.endCol)] = move.pieceCaptured
+            else:
+                hidden[(move.endRow, move.endCol)] = move.pieceCaptured
+        highlights = getHighlights(state, validMoves, selectedSquare)
+        for row in range(DIMENSION):
+            for column in range(DIMENSION):
+                square = (hidden.get((row, column), state.board[row][column]), highlights.get((row, column)))
+                if square != self.squares[row][column]:
+                    self.drawSquare(row, column, *square)
+                    self.squares[row][column] = square
+        if self.moveLog.update(state.log):
+            self.moveLog.draw(self.screen)
+            self.dirty.append(self.moveLog.rect)
+        if self.animation is not None:
+            self.drawAnimatedPiece()
+    
+    def drawSquare(self, row, column, piece, highlight=None):
+        rect = pygame.Rect(column * squareSize, row * squareSize, squareSize, squareSize)
+        self.layer.blit(self.background, rect, rect)
+        if highlight is not None:
+            self.layer.blit(self.highlights[highlight], rect)
+        if piece != "--":
+            self.layer.blit(IMAGES[piece], rect)
+        self.screen.blit(self.layer, rect, rect)
+        self.dirty.append(rect)
+    
+    def update(self):
+        """Push the rectangles that were drawn to the display"""
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
+    
+    def startAnimation(self, move):
+        """Animate the given move, which has already been made. Any animation still playing is cut short."""
+        self.stopAnimation()
+        squares = abs(move.endRow - move.startRow) + abs(move.endCol - move.startCol)
+        self.animation = (move, pygame.time.get_ticks(), squares * 1000 / ANIMATION_SPEED)
+    
+    def stopAnimation(self):
+        """Take the animated piece off the screen. The next draw() shows its end square as it really is."""
+        if self.pieceRect is not None:
+            self.screen.blit(self.layer, self.pieceRect, self.pieceRect)
+            self.dirty.append(self.pieceRect)
+            self.pieceRect = None
+        self.animation = None
+    
+    def drawAnimatedPiece(self):
+        move, start, duration = self.animation
+        progress = min((pygame.time.get_ticks() - start) / duration, 1)
+        row = move.startRow + (move.endRow - move.startRow) * progress
+        column = move.startCol + (move.endCol - move.startCol) * progress
+        if self.pieceRect is not None:
+            self.screen.blit(self.layer, self.pieceRect, self.pieceRect)
+            self.dirty.append(self.pieceRect)
+        self.pieceRect = pygame.Rect(column * squareSize, row * squareSize, squareSize, squareSize)
+        self.screen.blit(IMAGES[move.pieceMoved], self.pieceRect)
+        self.dirty.append(self.pieceRect)
+
+class MoveLogView():
+    """
+    The move log panel, with one line per pair of moves.
+    Each line is rendered once and kept as a surface, so a new move only renders the line it is on, and drawing
+    only blits the lines that fit in the panel. Drawing costs the same however long the game is.
+    Once the log is longer than the panel, it can be scrolled, and it follows new moves while scrolled to the bottom.
+    """
+    padding = 5
+    
+    def __init__(self, font):
+        self.font = font
+        self.rect = pygame.Rect(BWIDTH, 0, LOGWIDTH, LOGHEIGHT)
+        self.lineHeight = font.get_linesize()
+        self.visibleLines = (LOGHEIGHT - 2 * self.padding) // self.lineHeight
+        self.log = None # The move log that the lines were rendered from
+        self.plies = 0 # How many of its moves the lines show
+        self.lines = [] # Rendered surface of each line
+        self.top = 0 # Index of the first line in view
+        self.changed = True # The panel has to be drawn again
+    
+    def update(self, log):
+        """Render the lines of any moves made (or undone) since the last call. Returns True if the panel has to be drawn again."""
+        if log is not self.log: # A new game
+            self.log, self.plies, self.lines = log, 0, []
+        if len(log) != self.plies:
+            following = self.top >= self.maxTop()
+            first = min(self.plies, len(log)) // 2 # The first line that has changed
+            del self.lines[first:]
+            for i in range(first * 2, len(log), 2):
+                moveString = str(i//2 + 1) + ": " + str(log[i]) + ", "
+                if i+1 < len(log):
+                    moveString += str(log[i+1])
+                self.lines.append(self.font.render(moveString, True, pygame.Color("white")))
+            self.plies = len(log)
+            self.top = self.maxTop() if following else min(self.top, self.maxTop())
+            self.changed = True
+        return self.changed
+    
+    def maxTop(self):
+        return max(len(self.lines) - self.visibleLines, 0)
+    
+    def scroll(self, lines):
+        """Scroll down by a number of lines (up if it is negative)"""
+        top = min(max(self.top + lines, 0), self.maxTop())
+        if top != self.top:
+            self.top = top
+            self.changed = True
+    
+    def draw(self, screen):
+        pygame.draw.rect(screen, pygame.Color("black"), self.rect)
+        textY = self.padding
+        for line in self.lines[self.top:self.top + self.visibleLines]:
+            screen.blit(line, self.rect.move(self.padding, textY))
+            textY += self.lineHeight
+        if len(self.lines) > self.visibleLines: # Scroll bar
+            height = LOGHEIGHT * self.visibleLines // len(self.lines)
+            barY = (LOGHEIGHT - height) * self.top // self.maxTop()
+            pygame.draw.rect(screen, pygame.Color("gray"), pygame.Rect(BWIDTH + LOGWIDTH - 4, barY, 4, height))
+        self.changed = False
+
+def drawBoard(screen):
+    """
+    Draw the squares on the board.
+    """
+    colors = [pygame.Color("white"), pygame.Color("gray")]
+    for row in range(DIMENSION):
+        for column in range(DIMENSION):
+            color = colors[((row + column) % 2)]
+            pygame.draw.rect(screen, color, pygame.Rect(column * squareSize, row * squareSize, squareSize, squareSize))
+
+def playAgain(result):
+    window = tk.Tk()
+    window.title("Play again?")
+    window.geometry("250x200")
+    
+    label0 = tk.Label(window, text=result, font=("Helvetica",12))
+    label0.place(relx=.5, rely=.2, anchor="n")
+    label1 = tk.Label(window, text="Would you like to play again?", font=("Helvetica",10))
+    label1.place(relx=.5, rely=.4, anchor="n")
+    
+    def setPlayAgain(n, w):
+        global restartGame
+        if n: # User wants to play again
+            restartGame = True
+        elif not n: # User does not want to play again
+            restartGame = False
+        w.destroy()
+    
+    button0 = tk.Button(window, text="Yes", command=lambda : setPlayAgain(1, window))
+    button0.place(relx=.5, rely=.6, anchor="center")
+    button1 = tk.Button(window, text="No", command=lambda : setPlayAgain(0, window))
+    button1.place(relx=.5, rely=.8, anchor="center")
+    
+    window.mainloop()
+
+def drawEndGameText(text, screen):
+    FONT = pygame.font.SysFont("Arial", 24, True, False)
+    textObj = FONT.render(text, 0, pygame.Color("red"))
+    textLoc = pygame.Rect(0, 0, BWIDTH, BHEIGHT).move(BWIDTH/2 - textObj.get_width()/2, BHEIGHT/2 - textObj.get_height()/2)
+    screen.blit(textObj, textLoc)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PyChess - Chess implementation in Python")
+    parser.add_argument("--perft", type=int, metavar="DEPTH", help="count the move tree to DEPTH without opening the GUI")
+    parser.add_argument("--divide", action="store_true", help="with --perft, show the count below each move")
+    parser.add_argument("--fen", default=STARTFEN, help="with --perft, the position to start from (default: the start position)")
+    parser.add_argument("--perft-suite", type=int, nargs="?", const=4, metavar="MAXDEPTH",
+                        help="check the move generator against the built-in reference positions (default depth: 4)")
+    parser.add_argument("--workers", type=int, nargs="?", const=os.cpu_count(), default=1, metavar="N",
+                        help="search the AI's moves with N processes (default with no N: one per CPU core)")
+    parser.add_argument("--uci", action="store_true", help="run as a UCI engine on stdin and stdout, without opening the GUI")
+    parser.add_argument("--import-benchmark", action="store_true", help="time how long the module takes to import, with and without the GUI")
+    parser.add_argument("--tournament", type=int, metavar="GAMES", help="play GAMES self-play games between two engine settings without the GUI")
+    parser.add_argument("--engine-a", default="", metavar="SETTINGS", help='with --tournament, settings of engine A, e.g. "depth=3" or "time=0.5,nodes=20000"')
+    parser.add_argument("--engine-b", default="", metavar="SETTINGS", help="with --tournament, settings of engine B")
+    parser.add_argument("--concurrency", type=int, metavar="N",
+                        help="with --tournament, --epd, --read-pgn or --build-book, the number of processes (default: one per CPU core, or 1 when reading PGN)")
+    parser.add_argument("--pgn", default="tournament.pgn", help="with --tournament, the PGN file that the games are added to")
+    parser.add_argument("--openings", metavar="FILE", help="with --tournament, a file with one FEN or move list per line to start games from")
+    parser.add_argument("--random-plies", type=int, default=0, metavar="N", help="with --tournament, start each pair of games with N random moves")
+    parser.add_argument("--seed", type=int, help="with --tournament, seed for the random openings")
+    parser.add_argument("--read-pgn", metavar="FILE", help="replay every game of a PGN file and report how many games, moves and results it has")
+    parser.add_argument("--book", default=BOOK_FILE, metavar="FILE", help="the Polyglot opening book to play from, or to write with --build-book (default: book.bin)")
+    parser.add_argument("--no-book", action="store_true", help="do not use an opening book")
+    parser.add_argument("--build-book", metavar="PGN", help="make an opening book from the games in a PGN file")
+    parser.add_argument("--book-plies", type=int, default=BOOK_PLIES, metavar="N", help="with --build-book, how many moves of each game to add (default: 20)")
+    parser.add_argument("--build-bitbases", action="store_true", help="generate the KQK, KRK and KPK endgame bitbases (in the bitbases folder)")
+    parser.add_argument("--epd", metavar="FILE", help="search the test positions of an EPD file and report how many were solved")
+    parser.add_argument("--time", type=float, default=1.0, metavar="SECONDS", help="with --epd, the time for each position (default: 1)")
+    parser.add_argument("--stats", metavar="FILE", help="append the statistics of each of the AI's searches to FILE, one JSON object per line")
+    parser.add_argument("--profile", action="store_true", help="with --stats, also time move generation, making and undoing moves, and evaluation")
+    args = parser.parse_args()
+    WORKERS = args.workers
+    STATS_FILE = args.stats
+    PROFILE = args.profile
+    BOOK_FILE = None if args.no_book else args.book
+    
+    if args.uci:
+        UCIEngine().run()
+    elif args.perft is not None:
+        runPerft(args.fen, args.perft, args.divide)
+    elif args.perft_suite is not None:
+        sys.exit(0 if runPerftSuite(args.perft_suite) & runFENCheck() & runSearchSuite() & runEvaluationCheck() else 1)
+    elif args.import_benchmark:
+        runImportBenchmark()
+    elif args.build_bitbases:
+        buildBitbases()
+    elif args.build_book is not None:
+        buildBook(args.build_book, args.book, args.book_plies, args.concurrency or 1)
+    elif args.read_pgn is not None:
+        runPGNStats(args.read_pgn, args.concurrency or 1)
+    elif args.epd is not None:
+        runEPD(args.epd, args.time, args.concurrency)
+    elif args.tournament is not None:
+        try:
+            settingsA, settingsB = parseEngineSettings(args.engine_a), parseEngineSettings(args.engine_b)
+        except ValueError as error:
+            parser.error(str(error))
+        openings = loadOpenings(args.openings) if args.openings else None
+        runTournament(args.tournament, settingsA, settingsB, args.pgn, args.concurrency, openings, args.random_plies, args.seed)
+    else:
+        loadGUI()
+        while True:
+            choosePlayer()
+            main()
+            if MANUAL_QUIT:
+                pygame.quit()
+                break
+            else:
+                playAgain(RESULT)
+                if restartGame:
+                    restartGame = False
+                else:
+                    pygame.quit()
+                    break
+        
+
+"""
+A portion of this code was derived from Eddie Sharick, Teacher of Computer Science and Physics
+His YouTube channel is linked below:
+https://www.youtube.com/@eddiesharick6649
+"""